@@ -0,0 +1,173 @@
+"""Content-addressed storage for uploaded project artifacts.
+
+Every distinct upload is stored once, at ``blobs/<sha256[:2]>/<sha256>``, and
+project directories hold hard links to it, so a resume attached to dozens of
+projects takes the space of one copy while each ``proj_<id>`` directory keeps
+its usual layout. The SHA-256 is computed while the upload is copied, and is
+the same key the Gemini upload and response caches use for that content.
+
+The index only records the newest artifact of each kind per project, so a
+blob counts as referenced while any project file is still hard-linked to it
+(an older resume, say) as well as while an ``artifacts`` row has its hash.
+``gc`` deletes blobs without references once their inode has been unchanged
+for a grace period, which covers a blob written but not yet linked::
+
+    python -m backend.blob_store gc
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Iterable, Tuple
+
+# Largest resume or job description accepted, in bytes.
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, max_bytes: int):
+        limit = f"{max_bytes // (1024 * 1024)} MB" if max_bytes >= 1024 * 1024 else f"{max_bytes} byte"
+        super().__init__(f"Upload exceeds the {limit} limit.")
+        self.max_bytes = max_bytes
+
+
+def hash_stream(source: BinaryIO, max_bytes: int = UPLOAD_MAX_BYTES) -> Tuple[str, int]:
+    """SHA-256 and size of ``source`` read in chunks from its current position."""
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := source.read(_COPY_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def write_atomic(
+    source: BinaryIO, dest: Path, max_bytes: int = UPLOAD_MAX_BYTES, empty_error: str | None = None
+) -> Tuple[str, int]:
+    """Copy ``source`` to ``dest`` in fixed-size chunks, hashing as it goes.
+
+    The data goes to a temporary file next to ``dest`` that is renamed over it
+    once complete, so readers never see a partial file. Raises ``UploadTooLarge``
+    as soon as more than ``max_bytes`` arrive, and ``ValueError(empty_error)``
+    for empty input when ``empty_error`` is given; ``dest`` is untouched then.
+    Returns the SHA-256 and size of what was written.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    handle = tempfile.NamedTemporaryFile(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part", delete=False)
+    try:
+        with handle:
+            while chunk := source.read(_COPY_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                handle.write(chunk)
+            if size == 0 and empty_error is not None:
+                raise ValueError(empty_error)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(handle.name, dest)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), size
+
+
+class BlobStore:
+    def __init__(self, root: Path):
+        self.root = root
+        self._incoming = root / "incoming"
+
+    def path(self, content_hash: str) -> Path:
+        return self.root / content_hash[:2] / content_hash
+
+    def put(
+        self, source: BinaryIO, max_bytes: int = UPLOAD_MAX_BYTES, empty_error: str | None = None
+    ) -> Tuple[str, int]:
+        """Store ``source`` (see ``write_atomic`` for the limits) and return its SHA-256 and size."""
+        self._incoming.mkdir(parents=True, exist_ok=True)
+        # The hash is only known once the copy is done, so land it under a unique
+        # name first and move it to its content address afterwards.
+        staged = self._incoming / f"upload-{uuid.uuid4().hex}"
+        content_hash, size = write_atomic(source, staged, max_bytes, empty_error)
+        blob = self.path(content_hash)
+        try:
+            # Already stored: keep the existing copy, restarting its GC grace period.
+            # That runs on ctime, which chmod bumps; the mtime is left alone, since
+            # it is also the mtime of every project file linked to this inode.
+            blob.chmod(0o444)
+            staged.unlink()
+        except FileNotFoundError:
+            blob.parent.mkdir(exist_ok=True)
+            staged.chmod(0o444)  # every project links this inode; never edit it in place
+            os.replace(staged, blob)
+        return content_hash, size
+
+    def link(self, content_hash: str, dest: Path) -> None:
+        """Point ``dest`` at a stored blob, replacing whatever was there atomically."""
+        staged = dest.parent / f".{dest.name}.{uuid.uuid4().hex}.link"
+        try:
+            os.link(self.path(content_hash), staged)
+        except OSError:
+            # Hard links need the same filesystem; fall back to a private copy.
+            shutil.copyfile(self.path(content_hash), staged)
+        os.replace(staged, dest)
+
+    def gc(self, referenced: Iterable[str], grace_seconds: float = GC_GRACE_SECONDS) -> dict:
+        """Delete blobs (and abandoned staging files) that are not in ``referenced``, not
+        hard-linked from a project directory and whose ctime is older than the grace period."""
+        referenced = set(referenced)
+        cutoff = time.time() - grace_seconds
+        kept = removed = freed = 0
+        if not self.root.is_dir():
+            return {"kept": kept, "removed": removed, "freed_bytes": freed}
+
+        for directory in self.root.iterdir():
+            if not directory.is_dir():
+                continue
+            for blob in directory.iterdir():
+                try:
+                    stat = blob.stat()
+                except FileNotFoundError:
+                    continue  # collected by a concurrent gc
+                if blob.name in referenced or stat.st_nlink > 1 or stat.st_ctime > cutoff:
+                    kept += 1
+                    continue
+                blob.unlink(missing_ok=True)
+                removed += 1
+                freed += stat.st_size
+        return {"kept": kept, "removed": removed, "freed_bytes": freed}
+
+
+def main() -> None:
+    from .project_storage import BLOBS, get_project_index
+
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed artifact store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    gc_parser = commands.add_parser("gc", help="Delete blobs no project references.")
+    gc_parser.add_argument(
+        "--grace-seconds",
+        type=float,
+        default=GC_GRACE_SECONDS,
+        help=f"Keep blobs modified more recently than this (default: {GC_GRACE_SECONDS}).",
+    )
+    args = parser.parse_args()
+
+    if args.command == "gc":
+        result = BLOBS.gc(get_project_index().referenced_hashes(), args.grace_seconds)
+        print(f"Removed {result['removed']} blobs ({result['freed_bytes']} bytes freed), kept {result['kept']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Async Gemini client for use inside FastAPI endpoints.
+
+Built on the SDK's ``client.aio`` interface so a model call awaits network I/O
+instead of blocking the event loop. Obtain it through ``GeminiClient.aio``.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+from typing import TYPE_CHECKING, AsyncIterator, BinaryIO
+
+from google.genai import errors, types
+
+from . import context_cache, metrics
+from .context_cache import as_list, with_cached_content
+from .file_cache import content_key, hash_bytes, hash_file, rewound
+from .gemini_client import INLINE_MAX_BYTES
+from .rate_limit import estimate_tokens
+from .response_cache import join_stream
+
+if TYPE_CHECKING:
+    from .gemini_client import GeminiClient
+
+
+class AsyncGeminiClient:
+    def __init__(self, client: GeminiClient):
+        self.sync = client
+        self.model = client.model
+        self.client = client.client.aio
+
+    async def upload_document(
+        self, file_path: str, display_name: str | None = None, mime_type: str | None = None, use_case: str | None = None
+    ) -> types.File:
+        resolved_path = self.sync._validate_path(file_path)
+        document_mime = mime_type or self.sync._guess_document_mime(resolved_path)
+        # Hashing reads the whole file; keep that disk I/O off the event loop.
+        content_hash = await asyncio.to_thread(hash_file, resolved_path)
+        return await self._upload(
+            content_key(content_hash, document_mime),
+            lambda: str(resolved_path),
+            types.UploadFileConfig(display_name=display_name or resolved_path.name, mime_type=document_mime),
+            use_case,
+        )
+
+    async def prepare_bytes(
+        self, data: bytes, mime_type: str, display_name: str | None = None, use_case: str | None = None
+    ) -> types.Part | types.File:
+        """Async variant of ``GeminiClient.prepare_bytes``; only the Files API fallback awaits."""
+        if len(data) <= INLINE_MAX_BYTES:
+            metrics.REGISTRY.count(use_case, self.model, "upload", "inline")
+            return types.Part.from_bytes(data=data, mime_type=mime_type)
+        return await self.upload_bytes(data, mime_type, display_name=display_name, use_case=use_case)
+
+    async def upload_bytes(
+        self, data: bytes, mime_type: str, display_name: str | None = None, use_case: str | None = None
+    ) -> types.File:
+        """Upload in-memory content, reusing the handle of an identical earlier upload."""
+        # Only payloads too large to send inline get here; hash them off the event loop.
+        content_hash = await asyncio.to_thread(hash_bytes, data)
+        return await self._upload(
+            content_key(content_hash, mime_type),
+            lambda: io.BytesIO(data),
+            types.UploadFileConfig(display_name=display_name, mime_type=mime_type),
+            use_case,
+        )
+
+    async def prepare_fileobj(
+        self,
+        file: BinaryIO,
+        size: int,
+        content_hash: str,
+        mime_type: str,
+        display_name: str | None = None,
+        use_case: str | None = None,
+    ) -> types.Part | types.File:
+        """Async variant of ``GeminiClient.prepare_fileobj``."""
+        if size <= INLINE_MAX_BYTES:
+            # Up to INLINE_MAX_BYTES from a spooled upload that may be on disk.
+            data = await asyncio.to_thread(lambda: rewound(file).read())
+            return await self.prepare_bytes(data, mime_type, display_name=display_name, use_case=use_case)
+        return await self.upload_fileobj(file, content_hash, mime_type, display_name=display_name, use_case=use_case)
+
+    async def upload_fileobj(
+        self, file: BinaryIO, content_hash: str, mime_type: str, display_name: str | None = None, use_case: str | None = None
+    ) -> types.File:
+        """Upload an open binary file, keyed by the SHA-256 the caller computed while storing it."""
+        return await self._upload(
+            content_key(content_hash, mime_type),
+            lambda: rewound(file),
+            types.UploadFileConfig(display_name=display_name, mime_type=mime_type),
+            use_case,
+        )
+
+    async def _upload(self, key: str, open_file, config: types.UploadFileConfig, use_case: str | None) -> types.File:
+        # The cache, rate limiter and single-flight table are shared with the sync client.
+        cached = self.sync.upload_cache.get(key)
+        if cached is not None:
+            metrics.REGISTRY.count(use_case, self.model, "upload", "cache_hit")
+            return cached
+        return await self.sync.single_flight.ado(
+            f"upload:{key}", lambda: self._upload_uncached(key, open_file, config, use_case)
+        )
+
+    async def _upload_uncached(self, key: str, open_file, config: types.UploadFileConfig, use_case: str | None) -> types.File:
+        with metrics.track("upload", self.model, use_case):
+            # Each attempt gets a fresh file object so a retry re-reads from the start.
+            uploaded = await self.sync.limiter.acall(lambda: self.client.files.upload(file=open_file(), config=config))
+        self.sync.upload_cache.put(key, uploaded)
+        return uploaded
+
+    async def generate(
+        self,
+        contents,
+        config: types.GenerateContentConfig | None = None,
+        cache: bool = True,
+        use_case: str | None = None,
+        prefix: list | None = None,
+    ) -> types.GenerateContentResponse:
+        """Await ``generate_content`` on the configured model, sharing the sync client's response cache."""
+        key = self.sync._request_key(as_list(prefix or []) + as_list(contents), config) if cache else None
+        if key is None:
+            return await self._generate(contents, config, use_case, prefix=prefix)
+        if self.sync.response_cache is not None:
+            cached = await self._cached(key)
+            if cached is not None:
+                metrics.REGISTRY.count(use_case, self.model, "generate", "cache_hit")
+                return cached
+        return await self.sync.single_flight.ado(key, lambda: self._generate(contents, config, use_case, key, prefix))
+
+    async def _generate(
+        self,
+        contents,
+        config: types.GenerateContentConfig | None,
+        use_case: str | None,
+        key: str | None = None,
+        prefix: list | None = None,
+    ) -> types.GenerateContentResponse:
+        async def call(request_contents, request_config):
+            return await self.sync.limiter.acall(
+                lambda: self.client.models.generate_content(model=self.model, contents=request_contents, config=request_config),
+                estimate_tokens(request_contents, request_config),
+            )
+
+        with metrics.track("generate", self.model, use_case) as record:
+            response = await self._with_prefix(prefix, contents, config, use_case, call)
+            record.observe(response)
+        if key is not None and self.sync.response_cache is not None:
+            await asyncio.to_thread(self.sync.response_cache.put, key, response)
+        return response
+
+    async def generate_stream(
+        self,
+        contents,
+        config: types.GenerateContentConfig | None = None,
+        cache: bool = True,
+        use_case: str | None = None,
+        prefix: list | None = None,
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        """Async variant of ``GeminiClient.generate_stream``."""
+        full_contents = as_list(prefix or []) + as_list(contents)
+        key = self.sync._request_key(full_contents, config) if cache and self.sync.response_cache is not None else None
+        if key is not None:
+            cached = await self._cached(key)
+            if cached is not None:
+                metrics.REGISTRY.count(use_case, self.model, "stream", "cache_hit")
+                yield cached
+                return
+
+        estimated_tokens = estimate_tokens(full_contents, config)
+
+        async def open_stream(request_contents, request_config):
+            return await self.sync.limiter.acall(lambda: self._open_stream(request_contents, request_config), estimated_tokens)
+
+        chunks = []
+        with metrics.track("stream", self.model, use_case) as record:
+            first, stream = await self._with_prefix(prefix, contents, config, use_case, open_stream)
+            if first is not None:
+                chunks.append(first)
+                yield first
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+            response = join_stream(chunks) if chunks else None
+            record.observe(response)
+
+        if response is not None:
+            self.sync.limiter.settle(response, estimated_tokens)
+            if key is not None:
+                await asyncio.to_thread(self.sync.response_cache.put, key, response)
+
+    async def _cached(self, key: str) -> types.GenerateContentResponse | None:
+        # Memory hits are answered inline; only the SQLite tier goes to a thread.
+        cache = self.sync.response_cache
+        cached = cache.get_memory(key)
+        return cached if cached is not None else await asyncio.to_thread(cache.get_disk, key)
+
+    async def _open_stream(self, contents, config: types.GenerateContentConfig | None):
+        stream = await self.client.models.generate_content_stream(model=self.model, contents=contents, config=config)
+        return await anext(stream, None), stream
+
+    async def _with_prefix(self, prefix: list | None, contents, config: types.GenerateContentConfig | None, use_case: str | None, call):
+        """Async variant of ``GeminiClient._with_prefix``; the context-cache registry is shared."""
+        if not prefix:
+            return await call(contents, config)
+        cache_key = self.sync._request_key(prefix, None)
+        name = await self._context_cache(prefix, cache_key, use_case)
+        if name is not None:
+            try:
+                return await call(contents, with_cached_content(config, name))
+            except errors.APIError as exc:
+                if not context_cache.is_stale(exc):
+                    raise
+                self.sync.context_caches.invalidate(cache_key)
+                name = await self._context_cache(prefix, cache_key, use_case)
+                if name is not None:
+                    return await call(contents, with_cached_content(config, name))
+        return await call(as_list(prefix) + as_list(contents), config)
+
+    async def _context_cache(self, prefix: list, cache_key: str, use_case: str | None) -> str | None:
+        registry = self.sync.context_caches
+        if registry is None:
+            return None
+        entry = registry.get(cache_key)
+        if entry is not None and not registry.due_for_refresh(entry):
+            return entry.name
+        return await self.sync.single_flight.ado(
+            f"context:{cache_key}", lambda: self._refresh_context_cache(prefix, cache_key, entry, use_case)
+        )
+
+    async def _refresh_context_cache(self, prefix: list, cache_key: str, entry, use_case: str | None) -> str | None:
+        registry = self.sync.context_caches
+        if entry is not None:
+            try:
+                with metrics.track("cache_update", self.model, use_case):
+                    updated = await self.sync.limiter.acall(
+                        lambda: self.client.caches.update(name=entry.name, config=types.UpdateCachedContentConfig(ttl=registry.ttl))
+                    )
+                return registry.store(cache_key, updated, refreshed=True).name
+            except Exception:
+                registry.invalidate(cache_key)
+
+        try:
+            with metrics.track("cache_create", self.model, use_case):
+                created = await self.sync.limiter.acall(
+                    lambda: self.client.caches.create(
+                        model=self.model, config=types.CreateCachedContentConfig(contents=prefix, ttl=registry.ttl)
+                    )
+                )
+        except Exception as exc:
+            # Caching is an optimization: on any failure send the prefix inline instead.
+            if isinstance(exc, errors.APIError) and exc.code == 400:
+                registry.store_unavailable(cache_key)
+            return None
+        return registry.store(cache_key, created).name
+
+    async def getResponse(self, query: str, cache: bool = True, use_case: str | None = None):
+        return (await self.generate(query, cache=cache, use_case=use_case)).text
+
+    async def getFileResponse(self, query: str, file: types.File | types.Part, cache: bool = True, use_case: str | None = None):
+        return (await self.generate([query, file], cache=cache, use_case=use_case)).text
@@ -0,0 +1,36 @@
+"""Select the model backend ``GeminiClient`` talks to.
+
+A backend is anything with the ``genai.Client`` surface ``GeminiClient`` uses:
+``models.generate_content``/``generate_content_stream``, ``files.upload`` and
+``caches.create``/``update``/``delete``, plus the same under ``aio``.
+``GEMINI_BACKEND`` picks one: ``live`` (default) for the Gemini API, ``fake``
+for the offline ``FakeGenaiClient`` configured by ``GEMINI_FAKE_*``.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Protocol
+
+from google import genai
+
+
+class ModelBackend(Protocol):
+    models: Any
+    files: Any
+    caches: Any
+    aio: Any
+
+
+def create_backend(name: str | None = None) -> ModelBackend:
+    # Read at call time: gemini_client loads .env after importing this module.
+    name = name or os.getenv("GEMINI_BACKEND", "live")
+    if name == "live":
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise EnvironmentError("GEMINI_API_KEY environment variable is not set.")
+        return genai.Client(api_key=api_key)
+    if name == "fake":
+        from .fake import FakeGenaiClient
+
+        return FakeGenaiClient.from_env()
+    raise ValueError(f"Unknown GEMINI_BACKEND {name!r}; expected 'live' or 'fake'.")
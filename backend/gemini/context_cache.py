@@ -0,0 +1,109 @@
+"""Track Gemini context caches created for repeated prompt prefixes.
+
+A prefix (e.g. the ResumeEditor instructions plus a job description) is keyed
+by the same hash scheme as the response cache. The registry remembers which
+``cachedContents/...`` handle serves each prefix and until when; the clients
+create a handle on first use, extend its TTL once less than half of it is
+left, and recreate it when it has expired or the server no longer knows it.
+Prefixes below the model's minimum cacheable size are remembered as
+unavailable for one TTL so we do not retry the create on every call.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from google.genai import errors, types
+
+DEFAULT_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "1") != "0"
+# Stop handing out a handle this close to its expiry.
+_EXPIRY_MARGIN_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    name: str | None  # None: the prefix cannot be cached (e.g. too few tokens)
+    expires_at: float
+
+
+class ContextCacheRegistry:
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.created = 0
+        self.reused = 0
+        self.refreshed = 0
+        self.recreated = 0
+        self.unavailable = 0
+        self._entries: dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> str:
+        return f"{self.ttl_seconds}s"
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at - _EXPIRY_MARGIN_SECONDS <= time.time():
+                del self._entries[key]
+                return None
+            if entry.name is not None:
+                self.reused += 1
+            return entry
+
+    def due_for_refresh(self, entry: CacheEntry) -> bool:
+        return entry.name is not None and entry.expires_at - time.time() < self.ttl_seconds / 2
+
+    def store(self, key: str, cached: types.CachedContent, refreshed: bool = False) -> CacheEntry:
+        expires_at = cached.expire_time.timestamp() if cached.expire_time else time.time() + self.ttl_seconds
+        entry = CacheEntry(cached.name, expires_at)
+        with self._lock:
+            self._entries[key] = entry
+            if refreshed:
+                self.refreshed += 1
+            else:
+                self.created += 1
+        return entry
+
+    def store_unavailable(self, key: str) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(None, time.time() + self.ttl_seconds)
+            self.unavailable += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.recreated += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": sum(1 for entry in self._entries.values() if entry.name is not None),
+                "created": self.created,
+                "reused": self.reused,
+                "refreshed": self.refreshed,
+                "recreated": self.recreated,
+                "unavailable": self.unavailable,
+            }
+
+
+def is_stale(exc: Exception) -> bool:
+    """Whether a generate call failed because its cached content expired or was deleted."""
+    if not isinstance(exc, errors.APIError) or exc.code not in (400, 403, 404):
+        return False
+    return "cache" in (exc.message or str(exc)).lower()
+
+
+def with_cached_content(config: types.GenerateContentConfig | None, name: str) -> types.GenerateContentConfig:
+    if config is None:
+        return types.GenerateContentConfig(cached_content=name)
+    return config.model_copy(update={"cached_content": name})
+
+
+def as_list(contents) -> list:
+    return list(contents) if isinstance(contents, (list, tuple)) else [contents]
@@ -0,0 +1,109 @@
+"""Remember Files API handles by content so identical uploads are skipped.
+
+Uploads are keyed by the SHA-256 of their bytes plus their MIME type. A handle
+is reused until shortly before the server-side ``expiration_time`` (the Files
+API keeps uploads for 48 hours), then evicted.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+from google.genai import types
+
+# Files live for 48 hours; assume slightly less when the API omits the expiry.
+_DEFAULT_LIFETIME = timedelta(hours=47)
+# A reused handle must outlive the request that references it.
+_EXPIRY_MARGIN = timedelta(minutes=10)
+_CHUNK_SIZE = 1024 * 1024
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("GEMINI_UPLOAD_CACHE_ENTRIES", "1024"))
+
+
+def content_key(content_hash: str, mime_type: str) -> str:
+    return f"{content_hash}:{mime_type}"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rewound(file: BinaryIO) -> BinaryIO:
+    """``file`` positioned at its start, so each upload attempt sends all of it."""
+    file.seek(0)
+    return file
+
+
+class UploadCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[types.File, datetime]] = OrderedDict()
+        self._names: dict[str, str] = {}  # File.name -> content key
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> types.File | None:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] - _EXPIRY_MARGIN <= now:
+                self._drop(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, file: types.File) -> None:
+        expires_at = file.expiration_time or datetime.now(timezone.utc) + _DEFAULT_LIFETIME
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        with self._lock:
+            self._entries[key] = (file, expires_at)
+            self._entries.move_to_end(key)
+            if file.name:
+                self._names[file.name] = key
+            self._evict_expired()
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def content_hash(self, file: types.File) -> str | None:
+        """SHA-256 of the bytes behind an upload made through this cache, if known."""
+        with self._lock:
+            key = self._names.get(file.name or "")
+        return key.split(":", 1)[0] if key else None
+
+    def _drop(self, key: str) -> None:
+        file, _ = self._entries.pop(key)
+        if file.name and self._names.get(file.name) == key:
+            del self._names[file.name]
+
+    def _evict_expired(self) -> None:
+        cutoff = datetime.now(timezone.utc) + _EXPIRY_MARGIN
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= cutoff]
+        for key in expired:
+            self._drop(key)
+        self.evictions += len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -1,10 +1,25 @@
+from __future__ import annotations
+
+import io
+import itertools
 import os
 import mimetypes 
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterator
 
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types 
+from google.genai import errors, types 
+
+from . import context_cache, metrics, response_cache
+from .backends import ModelBackend, create_backend
+from .context_cache import ContextCacheRegistry, as_list, with_cached_content
+from .file_cache import UploadCache, content_key, hash_bytes, hash_file, rewound
+from .rate_limit import estimate_tokens, limiter_for
+from .response_cache import ResponseCache, join_stream
+from .single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from .async_gemini_client import AsyncGeminiClient
 
 _FILE_PATH = Path(__file__).resolve()
 _ENV_SEARCH_PATHS: list[Path] = []
@@ -34,6 +49,11 @@ for env_path in _ENV_SEARCH_PATHS:
 if not _loaded:
     load_dotenv(override=False)
 
+# Files at or below this size are sent inline with the request instead of through
+# the Files API. Requests are capped at 20 MB after base64 encoding (+33%).
+INLINE_MAX_BYTES = int(os.getenv("GEMINI_INLINE_MAX_BYTES", str(14 * 1024 * 1024)))
+
+
 class GeminiClient:
     """Gemini Client (Google Gen AI SDK v1.0+)"""
     __instance = None 
@@ -55,7 +75,7 @@ class GeminiClient:
         return cls.__instance
 
 
-    def __init__(self, model: str):
+    def __init__(self, model: str, client: ModelBackend | None = None):
         if getattr(self, "_initialized", False):
             if model != self.model:
                 raise ValueError(
@@ -65,23 +85,26 @@ class GeminiClient:
             return
 
         self.model = model
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise EnvironmentError("GEMINI_API_KEY environment variable is not set.")
-
-        # Initialize the new Client
-        self.client = genai.Client(api_key=api_key)
+        # The Gemini API unless GEMINI_BACKEND selects another backend (see backends.py).
+        self.client = client if client is not None else create_backend()
+        self.upload_cache = UploadCache()
+        self.response_cache = ResponseCache() if response_cache.ENABLED else None
+        self.limiter = limiter_for(model)
+        # Concurrent identical uploads and generations share one upstream call.
+        self.single_flight = SingleFlight()
+        self.context_caches = ContextCacheRegistry() if context_cache.ENABLED else None
         self._initialized = True
 
-    def upload_pdf(self, file_path: str, display_name: str | None = None):
+    def upload_pdf(self, file_path: str, display_name: str | None = None, use_case: str | None = None):
         resolved_path = self._validate_path(file_path)
         return self._upload_file(
             resolved_path,
             mime_type="application/pdf",
             display_name=display_name,
+            use_case=use_case,
         )
 
-    def upload_image(self, file_path: str, display_name: str | None = None, mime_type: str | None = None):
+    def upload_image(self, file_path: str, display_name: str | None = None, mime_type: str | None = None, use_case: str | None = None):
         resolved_path = self._validate_path(file_path)
         
         image_mime = mime_type or self._guess_image_mime(resolved_path)
@@ -93,39 +116,295 @@ class GeminiClient:
             resolved_path,
             mime_type=image_mime,
             display_name=display_name,
+            use_case=use_case,
         )
 
-    def upload_document(self, file_path: str, display_name: str | None = None, mime_type: str | None = None):
+    def upload_document(self, file_path: str, display_name: str | None = None, mime_type: str | None = None, use_case: str | None = None):
         resolved_path = self._validate_path(file_path)
-        document_mime = mime_type or mimetypes.guess_type(resolved_path.name)[0] or "application/octet-stream"
+        document_mime = mime_type or self._guess_document_mime(resolved_path)
 
         return self._upload_file(
             resolved_path,
             mime_type=document_mime,
             display_name=display_name,
+            use_case=use_case,
+        )
+
+    def prepare_bytes(
+        self, data: bytes, mime_type: str, display_name: str | None = None, use_case: str | None = None
+    ) -> types.Part | types.File:
+        """Attach in-memory content to a request.
+
+        Content up to ``INLINE_MAX_BYTES`` becomes an inline ``Part``, which saves
+        the upload round trip; anything larger goes through ``upload_bytes``.
+        """
+        if len(data) <= INLINE_MAX_BYTES:
+            metrics.REGISTRY.count(use_case, self.model, "upload", "inline")
+            return types.Part.from_bytes(data=data, mime_type=mime_type)
+        return self.upload_bytes(data, mime_type, display_name=display_name, use_case=use_case)
+
+    def upload_bytes(self, data: bytes, mime_type: str, display_name: str | None = None, use_case: str | None = None) -> types.File:
+        """Upload in-memory content, reusing the handle of an identical earlier upload."""
+        key = content_key(hash_bytes(data), mime_type)
+        cached = self.upload_cache.get(key)
+        if cached is not None:
+            metrics.REGISTRY.count(use_case, self.model, "upload", "cache_hit")
+            return cached
+
+        return self.single_flight.do(
+            f"upload:{key}",
+            lambda: self._upload(
+                key,
+                lambda: io.BytesIO(data),
+                types.UploadFileConfig(display_name=display_name, mime_type=mime_type),
+                use_case,
+            ),
         )
 
-    def _upload_file(self, file_path: Path, mime_type: str, display_name: str | None) -> types.File:
+    def prepare_fileobj(
+        self,
+        file: BinaryIO,
+        size: int,
+        content_hash: str,
+        mime_type: str,
+        display_name: str | None = None,
+        use_case: str | None = None,
+    ) -> types.Part | types.File:
+        """``prepare_bytes`` for an open file whose size and SHA-256 are already known.
+
+        Only content small enough to go inline is read into memory; larger files
+        are streamed to the Files API by ``upload_fileobj``.
         """
-        Uploads to the File API.
+        if size <= INLINE_MAX_BYTES:
+            return self.prepare_bytes(rewound(file).read(), mime_type, display_name=display_name, use_case=use_case)
+        return self.upload_fileobj(file, content_hash, mime_type, display_name=display_name, use_case=use_case)
+
+    def upload_fileobj(
+        self, file: BinaryIO, content_hash: str, mime_type: str, display_name: str | None = None, use_case: str | None = None
+    ) -> types.File:
+        """Upload an open binary file, keyed by the SHA-256 the caller computed while storing it."""
+        key = content_key(content_hash, mime_type)
+        cached = self.upload_cache.get(key)
+        if cached is not None:
+            metrics.REGISTRY.count(use_case, self.model, "upload", "cache_hit")
+            return cached
+
+        return self.single_flight.do(
+            f"upload:{key}",
+            lambda: self._upload(
+                key,
+                lambda: rewound(file),
+                types.UploadFileConfig(display_name=display_name, mime_type=mime_type),
+                use_case,
+            ),
+        )
+
+    def _upload_file(self, file_path: Path, mime_type: str, display_name: str | None, use_case: str | None = None) -> types.File:
+        """
+        Uploads to the File API, reusing the handle of an identical earlier upload.
         Returns a google.genai.types.File object.
         """
+        key = content_key(hash_file(file_path), mime_type)
+        cached = self.upload_cache.get(key)
+        if cached is not None:
+            metrics.REGISTRY.count(use_case, self.model, "upload", "cache_hit")
+            return cached
+
         display = display_name or file_path.name
-        return self.client.files.upload(
-            file=str(file_path),
-            config=types.UploadFileConfig(
-                display_name=display, 
-                mime_type=mime_type
-            )
+        return self.single_flight.do(
+            f"upload:{key}",
+            lambda: self._upload(
+                key,
+                lambda: str(file_path),
+                types.UploadFileConfig(
+                    display_name=display, 
+                    mime_type=mime_type
+                ),
+                use_case,
+            ),
         )
+
+    def _upload(self, key: str, open_file, config: types.UploadFileConfig, use_case: str | None) -> types.File:
+        with metrics.track("upload", self.model, use_case):
+            uploaded = self.limiter.call(lambda: self.client.files.upload(file=open_file(), config=config))
+        self.upload_cache.put(key, uploaded)
+        return uploaded
     
-    def getResponse(self, query:str):
-        response = self.client.models.generate_content(model=self.model, contents=query)
-        return response.text
+    def generate(
+        self,
+        contents,
+        config: types.GenerateContentConfig | None = None,
+        cache: bool = True,
+        use_case: str | None = None,
+        prefix: list | None = None,
+    ) -> types.GenerateContentResponse:
+        """Call ``generate_content`` on the configured model.
 
-    def getFileResponse(self, query:str, file:types.File):
-        response = self.client.models.generate_content(model=self.model, contents=[query, file])
-        return response.text
+        Identical requests are answered from the response cache, or share the
+        result of an identical call already in flight, unless ``cache`` is False.
+        Upstream calls are paced by the model's rate limiter and retried on 429/5xx.
+        ``use_case`` labels the call in the metrics exposed at ``/metrics``.
+        ``prefix`` holds leading contents shared by many calls (instructions, a
+        job description); it is served from a Gemini context cache when the
+        model accepts one, and sent in front of ``contents`` otherwise.
+        """
+        key = self._request_key(as_list(prefix or []) + as_list(contents), config) if cache else None
+        if key is None:
+            return self._generate(contents, config, use_case, prefix=prefix)
+        if self.response_cache is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                metrics.REGISTRY.count(use_case, self.model, "generate", "cache_hit")
+                return cached
+        return self.single_flight.do(key, lambda: self._generate(contents, config, use_case, key, prefix))
+
+    def _generate(
+        self,
+        contents,
+        config: types.GenerateContentConfig | None,
+        use_case: str | None,
+        key: str | None = None,
+        prefix: list | None = None,
+    ) -> types.GenerateContentResponse:
+        def call(request_contents, request_config):
+            return self.limiter.call(
+                lambda: self.client.models.generate_content(model=self.model, contents=request_contents, config=request_config),
+                estimate_tokens(request_contents, request_config),
+            )
+
+        with metrics.track("generate", self.model, use_case) as record:
+            response = self._with_prefix(prefix, contents, config, use_case, call)
+            record.observe(response)
+        if key is not None and self.response_cache is not None:
+            self.response_cache.put(key, response)
+        return response
+
+    def generate_stream(
+        self,
+        contents,
+        config: types.GenerateContentConfig | None = None,
+        cache: bool = True,
+        use_case: str | None = None,
+        prefix: list | None = None,
+    ) -> Iterator[types.GenerateContentResponse]:
+        """Yield ``generate_content_stream`` chunks as they arrive.
+
+        A cached response is replayed as a single chunk, and a stream that runs
+        to completion is cached. Only opening the stream (up to the first chunk)
+        is rate limited and retried. Streams are not coalesced. ``prefix`` works
+        as in ``generate``.
+        """
+        full_contents = as_list(prefix or []) + as_list(contents)
+        key = self._request_key(full_contents, config) if cache and self.response_cache is not None else None
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                metrics.REGISTRY.count(use_case, self.model, "stream", "cache_hit")
+                yield cached
+                return
+
+        estimated_tokens = estimate_tokens(full_contents, config)
+        chunks = []
+        with metrics.track("stream", self.model, use_case) as record:
+            first, stream = self._with_prefix(
+                prefix,
+                contents,
+                config,
+                use_case,
+                lambda request_contents, request_config: self.limiter.call(
+                    lambda: self._open_stream(request_contents, request_config), estimated_tokens
+                ),
+            )
+            for chunk in itertools.chain([first] if first is not None else [], stream):
+                chunks.append(chunk)
+                yield chunk
+            response = join_stream(chunks) if chunks else None
+            record.observe(response)
+
+        if response is not None:
+            self.limiter.settle(response, estimated_tokens)
+            if key is not None:
+                self.response_cache.put(key, response)
+
+    def _open_stream(self, contents, config: types.GenerateContentConfig | None):
+        # The request is only sent once the SDK's generator is advanced.
+        stream = iter(self.client.models.generate_content_stream(model=self.model, contents=contents, config=config))
+        return next(stream, None), stream
+
+    def _with_prefix(self, prefix: list | None, contents, config: types.GenerateContentConfig | None, use_case: str | None, call):
+        """Run ``call(contents, config)`` with ``prefix`` served from a context cache where possible."""
+        if not prefix:
+            return call(contents, config)
+        cache_key = self._request_key(prefix, None)
+        name = self._context_cache(prefix, cache_key, use_case)
+        if name is not None:
+            try:
+                return call(contents, with_cached_content(config, name))
+            except errors.APIError as exc:
+                if not context_cache.is_stale(exc):
+                    raise
+                # Expired or deleted server-side before our TTL said so: recreate once.
+                self.context_caches.invalidate(cache_key)
+                name = self._context_cache(prefix, cache_key, use_case)
+                if name is not None:
+                    return call(contents, with_cached_content(config, name))
+        return call(as_list(prefix) + as_list(contents), config)
+
+    def _context_cache(self, prefix: list, cache_key: str, use_case: str | None) -> str | None:
+        """Name of a live context cache holding ``prefix``, creating or extending it as needed."""
+        if self.context_caches is None:
+            return None
+        entry = self.context_caches.get(cache_key)
+        if entry is not None and not self.context_caches.due_for_refresh(entry):
+            return entry.name
+        return self.single_flight.do(f"context:{cache_key}", lambda: self._refresh_context_cache(prefix, cache_key, entry, use_case))
+
+    def _refresh_context_cache(self, prefix: list, cache_key: str, entry, use_case: str | None) -> str | None:
+        if entry is not None:
+            try:
+                with metrics.track("cache_update", self.model, use_case):
+                    updated = self.limiter.call(
+                        lambda: self.client.caches.update(
+                            name=entry.name, config=types.UpdateCachedContentConfig(ttl=self.context_caches.ttl)
+                        )
+                    )
+                return self.context_caches.store(cache_key, updated, refreshed=True).name
+            except Exception:
+                self.context_caches.invalidate(cache_key)
+
+        try:
+            with metrics.track("cache_create", self.model, use_case):
+                created = self.limiter.call(
+                    lambda: self.client.caches.create(
+                        model=self.model,
+                        config=types.CreateCachedContentConfig(contents=prefix, ttl=self.context_caches.ttl),
+                    )
+                )
+        except Exception as exc:
+            # Caching is an optimization: on any failure send the prefix inline instead.
+            if isinstance(exc, errors.APIError) and exc.code == 400:
+                # Typically below the model's minimum cacheable token count.
+                self.context_caches.store_unavailable(cache_key)
+            return None
+        return self.context_caches.store(cache_key, created).name
+
+    def getResponse(self, query:str, cache: bool = True, use_case: str | None = None):
+        return self.generate(query, cache=cache, use_case=use_case).text
+
+    def getFileResponse(self, query:str, file:types.File | types.Part, cache: bool = True, use_case: str | None = None):
+        return self.generate([query, file], cache=cache, use_case=use_case).text
+
+    def _request_key(self, contents, config: types.GenerateContentConfig | None) -> str:
+        return response_cache.request_key(self.model, contents, config, self.upload_cache.content_hash)
+
+    @property
+    def aio(self) -> AsyncGeminiClient:
+        """Async counterpart sharing this client's model and credentials."""
+        if getattr(self, "_aio", None) is None:
+            from .async_gemini_client import AsyncGeminiClient
+
+            self._aio = AsyncGeminiClient(self)
+        return self._aio
 
     def _validate_path(self, file_path: str) -> Path:
         resolved = Path(file_path).expanduser().resolve()
@@ -133,6 +412,9 @@ class GeminiClient:
             raise FileNotFoundError(f"File does not exist: {resolved}")
         return resolved
 
+    def _guess_document_mime(self, file_path: Path) -> str:
+        return mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+
     def _guess_image_mime(self, file_path: Path) -> str | None:
         ext = file_path.suffix.lower()
         if ext in self._IMAGE_EXTENSIONS:
@@ -0,0 +1,148 @@
+"""Latency and token accounting for Gemini calls, rendered for Prometheus.
+
+Every upstream model or upload call is wrapped in ``track``, which records its
+latency, outcome and token usage under the caller's ``use_case`` label. The
+numbers are aggregated in-process (a lock and a few dict updates per call) and
+served in the Prometheus text format by ``render``; no client library needed.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from google.genai import errors
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+TOKEN_KINDS = {
+    "prompt": "prompt_token_count",
+    "output": "candidates_token_count",
+    "cached": "cached_content_token_count",
+    "thoughts": "thoughts_token_count",
+}
+UNLABELLED = "other"
+
+
+class CallRecord:
+    """Filled in by the caller inside ``track`` once the response is known."""
+
+    __slots__ = ("outcome", "usage")
+
+    def __init__(self):
+        self.outcome = "ok"
+        self.usage = None
+
+    def observe(self, response) -> None:
+        self.usage = getattr(response, "usage_metadata", None)
+
+
+class Registry:
+    def __init__(self):
+        self._requests: dict[tuple[str, ...], int] = {}
+        self._latency: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+        self._tokens: dict[tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, use_case: str | None, model: str, operation: str, outcome: str) -> None:
+        """Count a call that never reached the API (e.g. a cache hit) without timing it."""
+        key = (use_case or UNLABELLED, model, operation, outcome)
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def record(self, use_case: str, model: str, operation: str, outcome: str, seconds: float, usage=None) -> None:
+        labels = (use_case, model, operation)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        token_counts = []
+        if usage is not None:
+            for kind, field in TOKEN_KINDS.items():
+                count = getattr(usage, field, None)
+                if count:
+                    token_counts.append(((use_case, model, kind), count))
+
+        with self._lock:
+            key = labels + (outcome,)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get(labels)
+            if histogram is None:
+                histogram = self._latency[labels] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            histogram[bucket] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+            for key, count in token_counts:
+                self._tokens[key] = self._tokens.get(key, 0) + count
+
+    @contextmanager
+    def track(self, operation: str, model: str, use_case: str | None) -> Iterator[CallRecord]:
+        record = CallRecord()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as exc:
+            record.outcome = outcome_for(exc)
+            raise
+        finally:
+            self.record(use_case or UNLABELLED, model, operation, record.outcome, time.perf_counter() - start, record.usage)
+
+    def render(self) -> str:
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = sorted((labels, list(values)) for labels, values in self._latency.items())
+            tokens = sorted(self._tokens.items())
+
+        lines = [
+            "# HELP gemini_requests_total Gemini calls by use case, model, operation and outcome.",
+            "# TYPE gemini_requests_total counter",
+        ]
+        for (use_case, model, operation, outcome), count in requests:
+            lines.append(
+                f"gemini_requests_total{_labels(use_case=use_case, model=model, operation=operation, outcome=outcome)} {count}"
+            )
+
+        lines += [
+            "# HELP gemini_request_duration_seconds Wall time of Gemini calls, including rate-limit waits and retries.",
+            "# TYPE gemini_request_duration_seconds histogram",
+        ]
+        for (use_case, model, operation), values in latency:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    "gemini_request_duration_seconds_bucket"
+                    f"{_labels(use_case=use_case, model=model, operation=operation, le=le)} {cumulative}"
+                )
+            base = _labels(use_case=use_case, model=model, operation=operation)
+            lines.append(f"gemini_request_duration_seconds_sum{base} {values[-2]:.6f}")
+            lines.append(f"gemini_request_duration_seconds_count{base} {values[-1]}")
+
+        lines += [
+            "# HELP gemini_tokens_total Tokens reported in usage_metadata, by kind (prompt, output, cached, thoughts).",
+            "# TYPE gemini_tokens_total counter",
+        ]
+        for (use_case, model, kind), count in tokens:
+            lines.append(f"gemini_tokens_total{_labels(use_case=use_case, model=model, kind=kind)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def outcome_for(exc: BaseException) -> str:
+    if isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+        return "cancelled"
+    if isinstance(exc, errors.APIError):
+        return "rate_limited" if exc.code == 429 else f"error_{exc.code}"
+    return "error"
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+track = REGISTRY.track
+render = REGISTRY.render
@@ -0,0 +1,233 @@
+"""Client-side quota pacing and retries for Gemini calls.
+
+Each model gets a ``RateLimiter`` with two token buckets (requests and tokens
+per minute) and a cap on in-flight calls. A caller reserves its share of both
+buckets up front and sleeps for however long the reservation puts the bucket
+in debt, so a burst is spread out at the refill rate instead of being sent at
+once and bounced with 429s. Transient failures are retried with full-jitter
+exponential backoff, or after the delay the server asked for; a server hint
+also pauses every other caller of the model so they do not pile on.
+
+Limits default to the ``GEMINI_RPM``/``GEMINI_TPM``/... environment variables
+and can be overridden per model with ``GEMINI_RATE_LIMITS``, e.g.
+``{"gemini-2.5-pro": {"rpm": 150, "tpm": 2000000, "concurrency": 4}}``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+from google.genai import errors, types
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Rough prompt-size estimate used until the response reports the real count.
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_FILE = 1000
+_DEFAULT_OUTPUT_TOKENS = 1024
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    rpm: int = int(os.getenv("GEMINI_RPM", "1000"))  # 0 disables the bucket
+    tpm: int = int(os.getenv("GEMINI_TPM", "1000000"))
+    concurrency: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+    max_retries: int = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+    base_delay: float = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1.0"))
+    max_delay: float = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "32.0"))
+
+    @classmethod
+    def for_model(cls, model: str) -> "ModelLimits":
+        overrides = json.loads(os.getenv("GEMINI_RATE_LIMITS", "{}") or "{}")
+        return replace(cls(), **overrides.get(model, {}))
+
+
+class TokenBucket:
+    """Bucket refilled continuously at ``per_minute / 60`` units per second."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now and return how long the caller must wait to cover any debt."""
+        with self._lock:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+            return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Return (positive) or take (negative) units after the fact."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm) if limits.rpm > 0 else None
+        self.tokens = TokenBucket(limits.tpm) if limits.tpm > 0 else None
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._paused_until = 0.0
+        self._threads = threading.BoundedSemaphore(limits.concurrency)
+        # asyncio semaphores are bound to the loop that first waits on them.
+        self._loops: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[[], T], estimated_tokens: int = 0) -> T:
+        for attempt in range(self.limits.max_retries + 1):
+            time.sleep(self._reserve(estimated_tokens))
+            try:
+                with self._threads:
+                    result = fn()
+            except Exception as exc:
+                delay = self._on_failure(exc, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            else:
+                self.settle(result, estimated_tokens)
+                return result
+        raise AssertionError("unreachable")
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int = 0) -> T:
+        semaphore = self._async_semaphore()
+        for attempt in range(self.limits.max_retries + 1):
+            await asyncio.sleep(self._reserve(estimated_tokens))
+            try:
+                async with semaphore:
+                    result = await fn()
+            except Exception as exc:
+                delay = self._on_failure(exc, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                self.settle(result, estimated_tokens)
+                return result
+        raise AssertionError("unreachable")
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._loops.get(loop)
+            if semaphore is None:
+                semaphore = self._loops[loop] = asyncio.Semaphore(self.limits.concurrency)
+            return semaphore
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None and estimated_tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait:
+            with self._lock:
+                self.throttled_seconds += wait
+        return wait
+
+    def settle(self, result, estimated_tokens: int) -> None:
+        """Correct the token reservation with the usage the response reports."""
+        usage = getattr(result, "usage_metadata", None)
+        if self.tokens is not None and usage is not None and usage.total_token_count:
+            self.tokens.adjust(estimated_tokens - usage.total_token_count)
+
+    def _on_failure(self, exc: Exception, attempt: int, estimated_tokens: int) -> float | None:
+        """Delay before the next attempt, or None if ``exc`` should propagate."""
+        if self.tokens is not None and estimated_tokens:
+            self.tokens.adjust(estimated_tokens)  # a rejected call consumed no tokens
+        if attempt >= self.limits.max_retries or not is_retryable(exc):
+            return None
+
+        hint = retry_hint(exc)
+        with self._lock:
+            self.retries += 1
+            if hint is not None:
+                self._paused_until = max(self._paused_until, time.monotonic() + hint)
+        if hint is not None:
+            return hint + random.uniform(0, self.limits.base_delay)
+        return random.uniform(0, min(self.limits.max_delay, self.limits.base_delay * 2**attempt))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rpm": self.limits.rpm,
+                "tpm": self.limits.tpm,
+                "concurrency": self.limits.concurrency,
+                "retries": self.retries,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+            }
+
+
+_LIMITERS: dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def limiter_for(model: str) -> RateLimiter:
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(model)
+        if limiter is None:
+            limiter = _LIMITERS[model] = RateLimiter(ModelLimits.for_model(model))
+        return limiter
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TimeoutException, httpx.NetworkError))
+
+
+def retry_hint(exc: Exception) -> float | None:
+    """Seconds the server asked us to wait, from ``Retry-After`` or a ``RetryInfo`` detail."""
+    if not isinstance(exc, errors.APIError):
+        return None
+    headers = getattr(exc.response, "headers", None)
+    if headers is not None:
+        retry_after = headers.get("retry-after")
+        if retry_after and retry_after.strip().replace(".", "", 1).isdigit():
+            return float(retry_after)
+
+    details = exc.details.get("error", exc.details) if isinstance(exc.details, dict) else {}
+    for detail in details.get("details", []) if isinstance(details, dict) else []:
+        if isinstance(detail, dict) and str(detail.get("@type", "")).endswith("RetryInfo"):
+            match = re.fullmatch(r"([\d.]+)s", str(detail.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    return None
+
+
+def estimate_tokens(contents, config: types.GenerateContentConfig | None) -> int:
+    output = (config.max_output_tokens if config is not None else None) or _DEFAULT_OUTPUT_TOKENS
+    return _prompt_tokens(contents) + output
+
+
+def _prompt_tokens(contents) -> int:
+    if isinstance(contents, (list, tuple)):
+        return sum(_prompt_tokens(item) for item in contents)
+    if isinstance(contents, str):
+        return len(contents) // _CHARS_PER_TOKEN + 1
+    if isinstance(contents, types.Content):
+        return _prompt_tokens(contents.parts or [])
+    if isinstance(contents, types.Part) and contents.text is not None:
+        return _prompt_tokens(contents.text)
+    return _TOKENS_PER_FILE
@@ -0,0 +1,208 @@
+"""Two-tier cache for ``generate_content`` responses.
+
+Responses are keyed by a hash of the model, the request contents and the
+generation config. Uploaded files contribute the SHA-256 of their content
+(looked up in the upload cache) rather than their per-upload URI, so the same
+resume uploaded twice, or sent inline instead of uploaded, still hits. A small
+in-memory LRU sits in front of a SQLite table; both honour the same TTL, and
+the table is trimmed least-recently-used first once it grows past
+``max_bytes``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from google.genai import types
+
+CACHE_PATH = Path(
+    os.getenv(
+        "GEMINI_RESPONSE_CACHE_PATH",
+        Path(__file__).resolve().parents[1] / "cache" / "gemini" / "responses.sqlite3",
+    )
+)
+ENABLED = os.getenv("GEMINI_RESPONSE_CACHE", "1") != "0"
+DEFAULT_TTL_SECONDS = float(os.getenv("GEMINI_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MEMORY_ENTRIES = int(os.getenv("GEMINI_RESPONSE_CACHE_ENTRIES", "256"))
+DEFAULT_MAX_BYTES = int(os.getenv("GEMINI_RESPONSE_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+
+def request_key(model: str, contents, config: types.GenerateContentConfig | None, file_hash: Callable[[types.File], str | None]) -> str:
+    payload = {
+        "model": model,
+        "contents": _normalize(contents, file_hash),
+        "config": config.model_dump(mode="json", exclude_none=True) if config is not None else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _normalize(contents, file_hash: Callable[[types.File], str | None]):
+    if isinstance(contents, (list, tuple)):
+        return [_normalize(item, file_hash) for item in contents]
+    if isinstance(contents, str):
+        return {"text": contents}
+    if isinstance(contents, types.File):
+        return {"file": file_hash(contents) or contents.uri or contents.name}
+    if isinstance(contents, types.Part) and contents.inline_data is not None and contents.inline_data.data:
+        # Same key as an uploaded file with these bytes, without serializing them.
+        return {"file": hashlib.sha256(contents.inline_data.data).hexdigest()}
+    if isinstance(contents, types.Content):
+        return {"role": contents.role, "parts": [_normalize(part, file_hash) for part in contents.parts or []]}
+    if isinstance(contents, types.Part):
+        return contents.model_dump(mode="json", exclude_none=True)
+    raise TypeError(f"Cannot build a cache key for {type(contents).__name__}")
+
+
+def join_stream(chunks: list[types.GenerateContentResponse]) -> types.GenerateContentResponse:
+    """Fold streamed chunks into one response so it can be cached like a regular call."""
+    last = chunks[-1]
+    finish_reason = last.candidates[0].finish_reason if last.candidates else None
+    text = "".join(chunk.text or "" for chunk in chunks)
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(role="model", parts=[types.Part(text=text)]),
+                finish_reason=finish_reason,
+            )
+        ],
+        usage_metadata=last.usage_metadata,
+        model_version=last.model_version,
+    )
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: Path | None = CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[types.GenerateContentResponse, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open(path) if path is not None else None
+        # Running total of the table's ``size`` column, so a put does not have to
+        # sum it. Other processes sharing the file are only seen by the recount
+        # done before anything is evicted.
+        self._total_bytes = self._stored_bytes() if self._db is not None else 0
+
+    @staticmethod
+    def _open(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        return db
+
+    def _stored_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> types.GenerateContentResponse | None:
+        response = self.get_memory(key)
+        return response if response is not None else self.get_disk(key)
+
+    def get_memory(self, key: str) -> types.GenerateContentResponse | None:
+        """Look ``key`` up in the in-memory tier only; cheap enough for an event loop."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            return None
+
+    def get_disk(self, key: str) -> types.GenerateContentResponse | None:
+        """Look ``key`` up in SQLite, promoting a hit to the memory tier."""
+        now = time.time()
+        with self._lock:
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT body, created FROM responses WHERE key = ? AND created > ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    response = types.GenerateContentResponse.model_validate_json(row[0])
+                    self._remember(key, response, row[1])
+                    self.disk_hits += 1
+                    return response
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: types.GenerateContentResponse) -> None:
+        if not response.candidates:
+            return  # blocked or empty responses are not worth replaying
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            if self._db is None:
+                return
+            body = response.model_dump_json(exclude_none=True)
+            replaced = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now, now),
+            )
+            self._total_bytes += len(body) - (replaced[0] if replaced is not None else 0)
+            self._trim(now)
+
+    def _remember(self, key: str, response: types.GenerateContentResponse, created: float) -> None:
+        self._entries[key] = (response, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.memory_entries:
+            self._entries.popitem(last=False)
+
+    def _trim(self, now: float) -> None:
+        expired = self._db.execute(
+            "DELETE FROM responses WHERE created <= ? RETURNING size", (now - self.ttl_seconds,)
+        ).fetchall()
+        self.evictions += len(expired)
+        self._total_bytes -= sum(size for (size,) in expired)
+        if self._total_bytes <= self.max_bytes:
+            return
+        self._total_bytes = self._stored_bytes()
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._entries.pop(key, None)
+            self.evictions += 1
+            self._total_bytes -= size
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self._db is not None else 0
+            return {
+                "memory_entries": len(self._entries),
+                "disk_entries": disk_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
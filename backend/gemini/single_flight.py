@@ -0,0 +1,81 @@
+"""Coalesce identical in-flight Gemini calls.
+
+While a call for a key is running, later callers with the same key wait for it
+and receive its result (or its exception) instead of issuing their own. Sync
+callers wait on a ``threading.Event``; async callers await a shared task,
+shielded so a cancelled caller does not cancel the call for everyone else.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls: dict[str, _Call] = {}
+        self._tasks: dict[tuple[int, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop, so flights are tracked per loop.
+        flight = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(flight)
+            if task is None:
+                task = self._tasks[flight] = loop.create_task(fn())
+                task.add_done_callback(lambda _: self._forget(flight))
+                self.calls += 1
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, flight: tuple[int, str]) -> None:
+        with self._lock:
+            self._tasks.pop(flight, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._calls) + len(self._tasks), "calls": self.calls, "shared": self.shared}
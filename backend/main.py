@@ -1,28 +1,70 @@
 """HTTP interface for project creation and other backend features."""
 from __future__ import annotations
 
+import json
+import mimetypes
 import os
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from google.genai import errors as genai_errors
 from pydantic import BaseModel
 
+from .blob_store import UPLOAD_MAX_BYTES, UploadTooLarge, hash_stream
 from .project_storage import (
     create_project_workspace,
-    load_latest_job_description,
+    get_project,
+    load_job_description,
     replace_job_description,
     save_original_resume,
 )
+from .use_cases.behavioral_questions import (
+    DEFAULT_BATCH_CONCURRENCY,
+    generate_behavioral_questions_async,
+    generate_behavioral_questions_batch_async,
+)
 from .use_cases.resume_editor import ResumeEditor
-from .use_cases.technical_questions import TechnicalQuestionsGenerator
+from .question_index.filters import QuestionFilter
+from .use_cases.technical_questions import TechnicalQuestionsGenerator, get_question_index, warm_up
+from .gemini import metrics as gemini_metrics
+from .gemini.file_cache import rewound
 from .gemini.gemini_client import GeminiClient
+from .gemini.rate_limit import RETRYABLE_STATUS_CODES, retry_hint
 
 GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")
 GEMINI_CLIENT = GeminiClient(model=GEMINI_MODEL_NAME)
 
-app = FastAPI(title="Recruit Backend")
+# Build the technical-question index at startup instead of on the first request.
+# Set to "0" for local development to build it lazily.
+WARM_UP_QUESTION_INDEX = os.getenv("WARM_UP_QUESTION_INDEX", "1") != "0"
+# POST /api/technical-questions/problems edits the shared question bank and has
+# no authentication, so it stays off unless a deployment opts in with "1".
+ALLOW_QUESTION_BANK_EDITS = os.getenv("ALLOW_QUESTION_BANK_EDITS", "0") == "1"
+
+
+def _warm_up_question_index() -> None:
+    try:
+        warm_up()
+    except Exception:
+        # The failure is kept on the index and reported by /api/health/ready;
+        # the next request retries the build.
+        pass
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if WARM_UP_QUESTION_INDEX:
+        # Build in the background so the liveness check answers while the index loads.
+        threading.Thread(target=_warm_up_question_index, name="question-index-warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Recruit Backend", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,15 +73,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Form fields and multipart boundaries on top of the file itself.
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request, call_next):
+    # Multipart bodies are spooled in full before an endpoint runs, so refuse
+    # oversized ones from their Content-Length instead of receiving them first.
+    # Bodies without a length are still capped while they are copied.
+    length = request.headers.get("content-length", "")
+    if (
+        request.headers.get("content-type", "").startswith("multipart/form-data")
+        and length.isdigit()
+        and int(length) > UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD_BYTES
+    ):
+        return JSONResponse(status_code=413, content={"detail": str(UploadTooLarge(UPLOAD_MAX_BYTES))})
+    return await call_next(request)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Gemini call counts, latency histograms and token usage in the Prometheus text format."""
+    return PlainTextResponse(gemini_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/health/live")
+async def liveness() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/api/health/ready")
+async def readiness():
+    """Report 503 until the technical-question index is built so traffic is held back."""
+    index = get_question_index()
+    body = {"status": index.state}
+    if index.error is not None:
+        body["error"] = str(index.error)
+    return JSONResponse(status_code=200 if index.ready else 503, content=body)
+
+
+def _check_upload(upload: UploadFile, empty_detail: str) -> None:
+    if upload.size == 0:
+        raise HTTPException(status_code=400, detail=empty_detail)
+    if upload.size is not None and upload.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=str(UploadTooLarge(UPLOAD_MAX_BYTES)))
+
 
 @app.post("/api/projects")
 async def create_project(job_title: str = Form(...), job_desc: UploadFile = File(...)) -> dict:
-    contents = await job_desc.read()
-    if not contents:
-        raise HTTPException(status_code=400, detail="Uploaded job description is empty.")
+    _check_upload(job_desc, "Uploaded job description is empty.")
 
-    project_info = create_project_workspace(job_title=job_title, job_desc_bytes=contents, job_desc_filename=job_desc.filename)
-    return project_info
+    # Streamed from the spooled upload to disk in chunks, never held in memory whole.
+    try:
+        return await run_in_threadpool(create_project_workspace, job_title, job_desc.file, job_desc.filename)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 class JobDescriptionPayload(BaseModel):
@@ -49,90 +140,378 @@ class JobDescriptionPayload(BaseModel):
 class TechnicalQuestionsPayload(BaseModel):
     job_description: str
     top_k: int | None = 3
+    # e.g. difficulties=["Medium", "Hard"], tags=["Graph", "Dynamic Programming"]
+    difficulties: list[str] | None = None
+    tags: list[str] | None = None
 
+    def question_filter(self) -> QuestionFilter | None:
+        return QuestionFilter.create(difficulties=self.difficulties, tags=self.tags)
+
+
+class TechnicalQuestionsBatchPayload(BaseModel):
+    items: list[TechnicalQuestionsPayload]
+
+
+class BehavioralQuestionsPayload(BaseModel):
+    resume: str
+    job_description: str
 
-@app.post("/api/projects/latest/resume")
-async def upload_original_resume(resume: UploadFile = File(...)) -> dict:
-    contents = await resume.read()
-    if not contents:
-        raise HTTPException(status_code=400, detail="Uploaded resume is empty.")
 
+class BehavioralQuestionsBatchPayload(BaseModel):
+    items: list[BehavioralQuestionsPayload]
+    concurrency: int | None = None
+
+
+class ProblemPayload(BaseModel):
+    task_id: str
+    query: str
+    difficulty: str
+    tags: list[str] = []
+    problem_description: str = ""
+    starter_code: str = ""
+    input_output: list = []
+
+
+class ProblemUpdatesPayload(BaseModel):
+    upsert: list[ProblemPayload] = []
+    delete: list[str] = []
+
+
+MAX_TECHNICAL_QUESTIONS_BATCH = 100
+MAX_BEHAVIORAL_QUESTIONS_BATCH = 500
+MAX_BEHAVIORAL_BATCH_CONCURRENCY = 32
+
+
+def _clamp_top_k(top_k: int | None) -> int:
+    return max(1, min(top_k or 3, 10))
+
+
+def _gemini_http_error(exc: Exception, action: str) -> HTTPException:
+    # Quota and overload errors that outlasted the client's retries are temporary:
+    # answer 503 with a Retry-After instead of a generic 500.
+    if isinstance(exc, genai_errors.APIError) and exc.code in RETRYABLE_STATUS_CODES:
+        retry_after = retry_hint(exc) or GEMINI_CLIENT.limiter.limits.max_delay
+        return HTTPException(
+            status_code=503,
+            detail=f"{action}: Gemini is over capacity, try again shortly.",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+    return HTTPException(status_code=500, detail=f"{action}: {exc}")
+
+
+@app.get("/api/projects/{project_id}")
+async def read_project(project_id: int) -> dict:
     try:
-        return save_original_resume(contents, resume.filename)
+        return await run_in_threadpool(get_project, project_id)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+async def _upload_original_resume(resume: UploadFile, project_id: int | None) -> dict:
+    _check_upload(resume, "Uploaded resume is empty.")
+
+    try:
+        return await run_in_threadpool(save_original_resume, resume.file, resume.filename, project_id)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@app.put("/api/projects/latest/job-desc")
-async def update_job_description(payload: JobDescriptionPayload) -> dict:
+# "latest" routes act on the most recently created project and are kept for
+# single-user setups; concurrent users should address their project by id.
+@app.post("/api/projects/latest/resume")
+async def upload_original_resume(resume: UploadFile = File(...)) -> dict:
+    return await _upload_original_resume(resume, None)
+
+
+@app.post("/api/projects/{project_id}/resume")
+async def upload_project_resume(project_id: int, resume: UploadFile = File(...)) -> dict:
+    return await _upload_original_resume(resume, project_id)
+
+
+async def _update_job_description(payload: JobDescriptionPayload, project_id: int | None) -> dict:
     try:
-        return replace_job_description(payload.job_description)
+        return await run_in_threadpool(replace_job_description, payload.job_description, project_id)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@app.post("/api/resume/latex")
-async def convert_resume_to_latex(resume: UploadFile = File(...), job_description: str | None = Form(None)) -> dict:
-    contents = await resume.read()
-    if not contents:
-        raise HTTPException(status_code=400, detail="Uploaded resume is empty.")
+@app.put("/api/projects/latest/job-desc")
+async def update_job_description(payload: JobDescriptionPayload) -> dict:
+    return await _update_job_description(payload, None)
+
+
+@app.put("/api/projects/{project_id}/job-desc")
+async def update_project_job_description(project_id: int, payload: JobDescriptionPayload) -> dict:
+    return await _update_job_description(payload, project_id)
+
+
+async def _read_resume_for_latex(
+    resume: UploadFile, job_description: str | None, project_id: int | None = None
+) -> tuple[str, int, str]:
+    """Store the resume in the project and return its SHA-256, size and the job description to tailor to."""
+    _check_upload(resume, "Uploaded resume is empty.")
 
     job_text = (job_description or "").strip()
     if not job_text:
         try:
-            _, job_text = load_latest_job_description()
+            _, job_text = await run_in_threadpool(load_job_description, project_id)
         except FileNotFoundError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     try:
-        save_original_resume(contents, resume.filename)
-    except FileNotFoundError:
+        saved = await run_in_threadpool(save_original_resume, resume.file, resume.filename, project_id)
+        content_hash, size = saved["sha256"], saved["size"]
+    except FileNotFoundError as exc:
+        if project_id is not None:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
         # Allow conversion even if a project has not been created yet
-        pass
+        try:
+            content_hash, size = await run_in_threadpool(hash_stream, rewound(resume.file))
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+    return content_hash, size, job_text
+
+
+async def _attach_resume(resume: UploadFile, content_hash: str, size: int):
     suffix = Path(resume.filename or "resume").suffix or ".pdf"
-    with NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-        temp_file.write(contents)
-        temp_path = temp_file.name
+    mime_type = mimetypes.guess_type(f"resume{suffix}")[0] or "application/octet-stream"
+    # Typical resumes are sent inline; large files are streamed to the Files API,
+    # where re-uploads of the same content reuse the first upload.
+    return await GEMINI_CLIENT.aio.prepare_fileobj(
+        resume.file, size, content_hash, mime_type, display_name=resume.filename, use_case="resume_editor"
+    )
+
+
+async def _convert_resume_to_latex(resume: UploadFile, job_description: str | None, project_id: int | None) -> dict:
+    content_hash, size, job_text = await _read_resume_for_latex(resume, job_description, project_id)
 
     try:
-        gemini_file = GEMINI_CLIENT.upload_document(temp_path, display_name=resume.filename)
+        resume_part = await _attach_resume(resume, content_hash, size)
         resume_editor = ResumeEditor(GEMINI_CLIENT, job_text)
-        latex = resume_editor.generate_latex_resume(gemini_file)
+        latex = await resume_editor.generate_latex_resume_async(resume_part)
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Failed to generate LaTeX resume: {exc}") from exc
-    finally:
-        Path(temp_path).unlink(missing_ok=True)
+        raise _gemini_http_error(exc, "Failed to generate LaTeX resume") from exc
 
     return {"latex": latex}
 
 
+@app.post("/api/resume/latex")
+async def convert_resume_to_latex(resume: UploadFile = File(...), job_description: str | None = Form(None)) -> dict:
+    return await _convert_resume_to_latex(resume, job_description, None)
+
+
+@app.post("/api/projects/{project_id}/resume/latex")
+async def convert_project_resume_to_latex(
+    project_id: int, resume: UploadFile = File(...), job_description: str | None = Form(None)
+) -> dict:
+    """``/api/resume/latex`` for one project: the resume is saved to it and its job description is the default."""
+    return await _convert_resume_to_latex(resume, job_description, project_id)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/resume/latex/stream")
+async def stream_resume_latex(resume: UploadFile = File(...), job_description: str | None = Form(None)) -> StreamingResponse:
+    """Server-Sent Events variant of ``/api/resume/latex``.
+
+    Emits ``chunk`` events (``{"text": ...}``) as the LaTeX is written, then a
+    ``done`` event with the full document, or an ``error`` event if the model
+    fails mid-stream.
+    """
+    return await _stream_resume_latex(resume, job_description, None)
+
+
+@app.post("/api/projects/{project_id}/resume/latex/stream")
+async def stream_project_resume_latex(
+    project_id: int, resume: UploadFile = File(...), job_description: str | None = Form(None)
+) -> StreamingResponse:
+    return await _stream_resume_latex(resume, job_description, project_id)
+
+
+async def _stream_resume_latex(resume: UploadFile, job_description: str | None, project_id: int | None) -> StreamingResponse:
+    content_hash, size, job_text = await _read_resume_for_latex(resume, job_description, project_id)
+
+    try:
+        resume_part = await _attach_resume(resume, content_hash, size)
+        pieces = ResumeEditor(GEMINI_CLIENT, job_text).stream_latex_resume_async(resume_part)
+        # Wait for the first piece so failures to start still map to an HTTP status.
+        first = await anext(pieces, None)
+    except Exception as exc:
+        raise _gemini_http_error(exc, "Failed to generate LaTeX resume") from exc
+
+    async def events():
+        latex = []
+        try:
+            if first is not None:
+                latex.append(first)
+                yield _sse_event("chunk", {"text": first})
+                async for piece in pieces:
+                    latex.append(piece)
+                    yield _sse_event("chunk", {"text": piece})
+        except Exception as exc:
+            yield _sse_event("error", {"detail": f"Failed to generate LaTeX resume: {exc}"})
+            return
+        yield _sse_event("done", {"latex": "".join(latex).strip()})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/gemini/cache-stats")
+async def get_gemini_cache_stats() -> dict:
+    """Hit, miss and eviction counters of the Gemini upload, response and context caches."""
+    response_cache = GEMINI_CLIENT.response_cache
+    return {
+        "uploads": GEMINI_CLIENT.upload_cache.stats(),
+        "responses": response_cache.stats() if response_cache is not None else None,
+        "rate_limit": GEMINI_CLIENT.limiter.stats(),
+        "single_flight": GEMINI_CLIENT.single_flight.stats(),
+        "context_caches": GEMINI_CLIENT.context_caches.stats() if GEMINI_CLIENT.context_caches is not None else None,
+    }
+
+
 @app.post("/api/technical-questions")
 async def get_technical_questions(payload: TechnicalQuestionsPayload) -> dict:
     job_desc = payload.job_description.strip()
     if not job_desc:
         raise HTTPException(status_code=400, detail="Job description text is empty.")
 
-    top_k = payload.top_k or 3
-    top_k = max(1, min(top_k, 10))
+    top_k = _clamp_top_k(payload.top_k)
 
     try:
-        generator = TechnicalQuestionsGenerator(job_description=job_desc)
-        questions = generator.find_top_questions(top_k)
+        # Encoding is CPU-bound (and the first call may build the index), so keep it off the event loop.
+        generator = await run_in_threadpool(TechnicalQuestionsGenerator, job_description=job_desc)
+        questions = await run_in_threadpool(generator.find_top_questions, top_k, payload.question_filter())
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to fetch technical questions: {exc}") from exc
 
     return {"questions": questions}
 
 
+@app.get("/api/technical-questions/filters")
+async def get_technical_question_filters() -> dict:
+    """Difficulties and tags that can be used as filters, with problem counts."""
+    # corpus() picks up problems added or deleted since the index was built.
+    corpus = await run_in_threadpool(get_question_index().corpus)
+    return corpus.filter_index.values()
+
+
+@app.post("/api/technical-questions/problems")
+async def update_technical_questions(payload: ProblemUpdatesPayload) -> dict:
+    """Add, replace (by task_id) or delete problems; only the upserted problems are encoded."""
+    if not ALLOW_QUESTION_BANK_EDITS:
+        raise HTTPException(
+            status_code=403, detail="Editing the question bank is disabled; set ALLOW_QUESTION_BANK_EDITS=1 to enable it."
+        )
+    if not payload.upsert and not payload.delete:
+        raise HTTPException(status_code=400, detail="No problems to add or delete.")
+
+    index = get_question_index()
+    upserts = [problem.model_dump() for problem in payload.upsert]
+    try:
+        version = await run_in_threadpool(index.apply_updates, upserts, payload.delete)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return {"version": version}
+
+
+@app.get("/api/technical-questions/cache-stats")
+async def get_technical_questions_cache_stats() -> dict:
+    """Hit, miss and eviction counters of the job-description embedding cache."""
+    return {"query_embeddings": get_question_index().query_cache.stats()}
+
+
+@app.post("/api/technical-questions/batch")
+async def get_technical_questions_batch(payload: TechnicalQuestionsBatchPayload) -> dict:
+    """Match many job descriptions in one call; results are keyed by input index."""
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="No job descriptions were provided.")
+    if len(payload.items) > MAX_TECHNICAL_QUESTIONS_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_TECHNICAL_QUESTIONS_BATCH} job descriptions can be processed per batch.",
+        )
+
+    job_descs = [item.job_description.strip() for item in payload.items]
+    empty = [position for position, text in enumerate(job_descs) if not text]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Job description text is empty at index {empty}.")
+    top_ks = [_clamp_top_k(item.top_k) for item in payload.items]
+    question_filters = [item.question_filter() for item in payload.items]
+
+    try:
+        generator = await run_in_threadpool(TechnicalQuestionsGenerator)
+        results = await run_in_threadpool(generator.find_top_questions_batch, job_descs, top_ks, question_filters)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch technical questions: {exc}") from exc
+
+    return {"results": {str(position): questions for position, questions in results.items()}}
+
+
+@app.post("/api/behavioral-questions")
+async def get_behavioral_questions(payload: BehavioralQuestionsPayload) -> dict:
+    if not payload.resume.strip():
+        raise HTTPException(status_code=400, detail="Resume cannot be empty.")
+    if not payload.job_description.strip():
+        raise HTTPException(status_code=400, detail="Job description cannot be empty.")
+
+    try:
+        return await generate_behavioral_questions_async(GEMINI_CLIENT, payload.resume, payload.job_description)
+    except ValueError as exc:
+        # The inputs were checked above, so this is a malformed Gemini response.
+        raise HTTPException(status_code=502, detail=f"Failed to generate behavioral questions: {exc}") from exc
+    except Exception as exc:
+        raise _gemini_http_error(exc, "Failed to generate behavioral questions") from exc
+
+
+@app.post("/api/behavioral-questions/batch")
+async def get_behavioral_questions_batch(payload: BehavioralQuestionsBatchPayload) -> StreamingResponse:
+    """Generate questions for many resume/job description pairs concurrently.
+
+    Streams one JSON object per line as each item finishes, in completion
+    order: ``{"index": i, "questions": [...]}`` or ``{"index": i, "error": "..."}``.
+    """
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="No resume/job description pairs were provided.")
+    if len(payload.items) > MAX_BEHAVIORAL_QUESTIONS_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BEHAVIORAL_QUESTIONS_BATCH} pairs can be processed per batch.",
+        )
+    concurrency = max(1, min(payload.concurrency or DEFAULT_BATCH_CONCURRENCY, MAX_BEHAVIORAL_BATCH_CONCURRENCY))
+    pairs = [(item.resume, item.job_description) for item in payload.items]
+
+    async def lines():
+        async for index, result in generate_behavioral_questions_batch_async(GEMINI_CLIENT, pairs, concurrency):
+            if isinstance(result, Exception):
+                yield json.dumps({"index": index, "error": str(result)}) + "\n"
+            else:
+                yield json.dumps({"index": index, **result}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,254 @@
+"""SQLite index of the project workspaces under ``backend/projects``.
+
+Records each project's id, title and directory, plus the path, SHA-256, size
+and timestamps of its artifacts (job title, job description, original
+resume), so finding the latest project or one artifact is an indexed lookup
+instead of a scan of every ``proj_<id>`` directory. The directories stay the
+source of truth: a missing index is rebuilt from them on open, and ``rebuild``
+re-creates it on demand after manual edits or a lost database.
+
+Ids are allocated inside a SQLite write transaction, which holds a file lock,
+so concurrent creates in any number of worker processes get distinct ids.
+
+Usage::
+
+    python -m backend.project_index rebuild
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+PROJECT_DIR_PATTERN = re.compile(r"proj_(\d+)$")
+INDEX_FILENAME = "index.sqlite3"
+# Artifact kind -> subdirectory of the project it lives in.
+ARTIFACT_DIRS = {"job_title": "job_title", "job_desc": "job_desc", "orig_resume": "orig_resume"}
+# Names the current file of an artifact directory. Project files are hard links
+# into the blob store, so their mtimes say when the content was first stored,
+# not when it was attached here.
+CURRENT_MARKER = ".current"
+_CHUNK_SIZE = 1 << 20
+# How long a writer waits for another process's transaction before failing.
+_BUSY_TIMEOUT_SECONDS = 30.0
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProjectIndex:
+    def __init__(self, root: Path, path: Path | None = None):
+        self.root = root
+        self.path = path or root / INDEX_FILENAME
+        self._lock = threading.Lock()
+        fresh = not self.path.exists()
+        self._db = self._open(self.path)
+        if fresh:
+            self.rebuild()
+
+    @staticmethod
+    def _open(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_SECONDS, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS projects ("
+            "id INTEGER PRIMARY KEY, title TEXT NOT NULL, project_dir TEXT NOT NULL, "
+            "created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "project_id INTEGER NOT NULL, kind TEXT NOT NULL, path TEXT NOT NULL, "
+            "sha256 TEXT NOT NULL, size INTEGER NOT NULL, updated REAL NOT NULL, "
+            "PRIMARY KEY (project_id, kind))"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS artifacts_sha256 ON artifacts (sha256)")
+        return db
+
+    def allocate(self, title: str) -> tuple[int, Path]:
+        """Reserve the next project id and directory path; safe across processes."""
+        now = time.time()
+        with self._lock, self._transaction():
+            project_id = self._db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM projects").fetchone()[0]
+            project_dir = self.root / f"proj_{project_id}"
+            self._db.execute(
+                "INSERT INTO projects (id, title, project_dir, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (project_id, title, str(project_dir), now, now),
+            )
+        return project_id, project_dir
+
+    def release(self, project_id: int) -> None:
+        """Drop a project whose workspace could not be created."""
+        with self._lock, self._transaction():
+            self._db.execute("DELETE FROM artifacts WHERE project_id = ?", (project_id,))
+            self._db.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+
+    def reconcile(self, project_id: int) -> None:
+        """Replace one project's entry with what its directory holds on disk."""
+        project_dir = self.root / f"proj_{project_id}"
+        scanned = _scan_project(project_id, project_dir) if project_dir.is_dir() else None
+        with self._lock, self._transaction():
+            self._db.execute("DELETE FROM artifacts WHERE project_id = ?", (project_id,))
+            self._db.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+            if scanned is not None:
+                project, artifacts = scanned
+                self._db.execute(
+                    "INSERT INTO projects (id, title, project_dir, created, updated) VALUES (?, ?, ?, ?, ?)", project
+                )
+                self._db.executemany(
+                    "INSERT INTO artifacts (project_id, kind, path, sha256, size, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                    artifacts,
+                )
+
+    def latest(self) -> tuple[int, Path] | None:
+        with self._lock:
+            row = self._db.execute("SELECT id, project_dir FROM projects ORDER BY id DESC LIMIT 1").fetchone()
+        return (row[0], Path(row[1])) if row is not None else None
+
+    def get(self, project_id: int) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, title, project_dir, created, updated FROM projects WHERE id = ?", (project_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            artifacts = self._db.execute(
+                "SELECT kind, path, sha256, size, updated FROM artifacts WHERE project_id = ?", (project_id,)
+            ).fetchall()
+        return {
+            "id": row[0],
+            "title": row[1],
+            "project_dir": row[2],
+            "created": row[3],
+            "updated": row[4],
+            "artifacts": {
+                kind: {"path": path, "sha256": sha256, "size": size, "updated": updated}
+                for kind, path, sha256, size, updated in artifacts
+            },
+        }
+
+    def artifact(self, project_id: int, kind: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path, sha256, size, updated FROM artifacts WHERE project_id = ? AND kind = ?",
+                (project_id, kind),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"path": row[0], "sha256": row[1], "size": row[2], "updated": row[3]}
+
+    def record_artifact(self, project_id: int, kind: str, path: Path, sha256: str, size: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts (project_id, kind, path, sha256, size, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (project_id, kind, str(path), sha256, size, now),
+            )
+            self._db.execute("UPDATE projects SET updated = ? WHERE id = ?", (now, project_id))
+
+    def references(self, sha256: str) -> int:
+        """How many project artifacts point at this content."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM artifacts WHERE sha256 = ?", (sha256,)).fetchone()[0]
+
+    def referenced_hashes(self) -> set[str]:
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT DISTINCT sha256 FROM artifacts")}
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # IMMEDIATE takes the database write lock up front, so a read-then-insert
+        # cannot interleave with another process doing the same.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def rebuild(self) -> int:
+        """Replace the index with what is on disk; returns the number of projects found."""
+        with self._lock, self._transaction():
+            projects, artifacts = _scan(self.root)
+            self._db.execute("DELETE FROM artifacts")
+            self._db.execute("DELETE FROM projects")
+            self._db.executemany(
+                "INSERT INTO projects (id, title, project_dir, created, updated) VALUES (?, ?, ?, ?, ?)", projects
+            )
+            self._db.executemany(
+                "INSERT INTO artifacts (project_id, kind, path, sha256, size, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                artifacts,
+            )
+        return len(projects)
+
+
+def _scan(root: Path) -> tuple[list[tuple], list[tuple]]:
+    projects = []
+    artifacts = []
+    if root.is_dir():
+        for path in root.iterdir():
+            match = PROJECT_DIR_PATTERN.fullmatch(path.name)
+            if not path.is_dir() or not match:
+                continue
+            project, project_artifacts = _scan_project(int(match.group(1)), path)
+            projects.append(project)
+            artifacts.extend(project_artifacts)
+    return projects, artifacts
+
+
+def _scan_project(project_id: int, path: Path) -> tuple[tuple, list[tuple]]:
+    title_path = path / "job_title" / "title.txt"
+    title = title_path.read_text(encoding="utf-8").strip() if title_path.is_file() else ""
+    stat = path.stat()
+    artifacts = []
+    for kind, directory in ARTIFACT_DIRS.items():
+        current = _current_file(path / directory)
+        if current is not None:
+            marker = path / directory / CURRENT_MARKER
+            updated = (marker if marker.is_file() else current).stat().st_mtime
+            artifacts.append((project_id, kind, str(current), hash_file(current), current.stat().st_size, updated))
+    return (project_id, title, str(path), stat.st_ctime, stat.st_mtime), artifacts
+
+
+def _current_file(directory: Path) -> Path | None:
+    if not directory.is_dir():
+        return None
+    marker = directory / CURRENT_MARKER
+    if marker.is_file():
+        current = directory / marker.read_text(encoding="utf-8").strip()
+        if current.is_file():
+            return current
+    # Directories written before the marker existed: fall back to the newest file.
+    # Other dotfiles are in-progress writes (see blob_store.write_atomic and BlobStore.link).
+    files = [path for path in directory.iterdir() if path.is_file() and not path.name.startswith(".")]
+    return max(files, key=lambda path: path.stat().st_mtime, default=None)
+
+
+def main() -> None:
+    from .project_storage import PROJECTS_ROOT
+
+    parser = argparse.ArgumentParser(description="Maintain the SQLite index of project workspaces.")
+    parser.add_argument("--root", type=Path, default=PROJECTS_ROOT, help="Projects directory (default: backend/projects).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Re-create the index from the proj_<id> directories on disk.")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        count = ProjectIndex(args.root).rebuild()
+        print(f"Indexed {count} projects under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
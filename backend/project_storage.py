@@ -1,21 +1,48 @@
 """Utilities for persisting uploaded project artifacts on disk."""
 from __future__ import annotations
 
+import hashlib
+import io
+import shutil
+import threading
 from pathlib import Path
-import re
-from typing import Dict, Tuple
+from typing import BinaryIO, Dict, Tuple
+
+from .blob_store import BlobStore, write_atomic
+from .project_index import CURRENT_MARKER, ProjectIndex
 
 PROJECTS_ROOT = Path(__file__).resolve().parent / "projects"
-_PROJECT_DIR_PATTERN = re.compile(r"proj_(\d+)$")
+# Inside PROJECTS_ROOT so project files can be hard links to the blobs.
+BLOBS = BlobStore(PROJECTS_ROOT / "blobs")
+_MAX_ALLOCATION_ATTEMPTS = 100
+
+_INDEX: ProjectIndex | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_project_index() -> ProjectIndex:
+    """Open the index on first use; it is rebuilt from disk if the database is missing."""
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = ProjectIndex(PROJECTS_ROOT)
+        return _INDEX
 
 
-def _next_project_id(root: Path) -> int:
-    existing_ids = [
-        int(match.group(1))
-        for path in root.iterdir()
-        if path.is_dir() and (match := _PROJECT_DIR_PATTERN.fullmatch(path.name))
-    ]
-    return max(existing_ids, default=0) + 1
+def _store_artifact(
+    project_id: int, kind: str, source: BinaryIO, dest: Path, empty_error: str | None = None
+) -> Tuple[str, int]:
+    """Store ``source`` once by content, link it at ``dest`` and record the reference."""
+    content_hash, size = BLOBS.put(source, empty_error=empty_error)
+    BLOBS.link(content_hash, dest)
+    # Lets a rebuild find this file again without going by mtime.
+    write_atomic(io.BytesIO(dest.name.encode("utf-8")), dest.parent / CURRENT_MARKER)
+    get_project_index().record_artifact(project_id, kind, dest, content_hash, size)
+    return content_hash, size
+
+
+def _as_stream(data: bytes | BinaryIO) -> BinaryIO:
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
 
 
 def _sanitize_filename(filename: str | None, default: str = "job_description.txt") -> str:
@@ -25,41 +52,75 @@ def _sanitize_filename(filename: str | None, default: str = "job_description.txt
     return Path(filename).name or default
 
 
-def _latest_project_dir(root: Path) -> Tuple[int, Path]:
-    """Return the most recently created project directory."""
-    project_dirs = [
-        (int(match.group(1)), path)
-        for path in root.iterdir()
-        if path.is_dir() and (match := _PROJECT_DIR_PATTERN.fullmatch(path.name))
-    ]
+def _project_dir(project_id: int | None = None) -> Tuple[int, Path]:
+    """Return the id and directory of ``project_id``, or of the most recently created project."""
+    index = get_project_index()
+    if project_id is None:
+        latest = index.latest()
+        if latest is None:
+            raise FileNotFoundError("No projects found. Create a project before uploading artifacts.")
+        return latest
 
-    if not project_dirs:
-        raise FileNotFoundError("No projects found. Create a project before uploading artifacts.")
+    project = index.get(project_id)
+    if project is None:
+        raise FileNotFoundError(f"Project {project_id} not found.")
+    return project_id, Path(project["project_dir"])
 
-    project_dirs.sort(key=lambda item: item[0], reverse=True)
-    project_id, project_path = project_dirs[0]
-    return project_id, project_path
 
+def get_project(project_id: int) -> Dict:
+    """Return a project's title, directory and indexed artifacts."""
+    project = get_project_index().get(project_id)
+    if project is None:
+        raise FileNotFoundError(f"Project {project_id} not found.")
+    return project
 
-def create_project_workspace(job_title: str, job_desc_bytes: bytes, job_desc_filename: str | None = None) -> Dict[str, str | int]:
-    """Persist project inputs inside backend/projects/proj_<id> structure."""
 
-    PROJECTS_ROOT.mkdir(parents=True, exist_ok=True)
+def create_project_workspace(
+    job_title: str, job_desc: bytes | BinaryIO, job_desc_filename: str | None = None
+) -> Dict[str, str | int]:
+    """Persist project inputs inside backend/projects/proj_<id> structure.
 
-    project_id = _next_project_id(PROJECTS_ROOT)
-    project_dir = PROJECTS_ROOT / f"proj_{project_id}"
-    job_title_dir = project_dir / "job_title"
-    job_desc_dir = project_dir / "job_desc"
-    job_title_dir.mkdir(parents=True, exist_ok=False)
-    job_desc_dir.mkdir(parents=True, exist_ok=False)
+    ``job_desc`` may be bytes or an open binary file, which is streamed to disk.
+    """
 
-    title_path = job_title_dir / "title.txt"
+    PROJECTS_ROOT.mkdir(parents=True, exist_ok=True)
+    index = get_project_index()
     title_text = job_title.strip()
-    title_path.write_text(title_text + ("\n" if title_text else ""), encoding="utf-8")
 
-    safe_name = _sanitize_filename(job_desc_filename)
-    job_desc_path = job_desc_dir / safe_name
-    job_desc_path.write_bytes(job_desc_bytes)
+    # The index hands out each id once, even across worker processes. A directory
+    # left on disk without an index entry keeps its id: the row just allocated is
+    # replaced by what that directory holds, and we move on to the next id.
+    for _ in range(_MAX_ALLOCATION_ATTEMPTS):
+        project_id, project_dir = index.allocate(title_text)
+        try:
+            project_dir.mkdir(exist_ok=False)
+            break
+        except FileExistsError:
+            index.reconcile(project_id)
+    else:
+        raise FileExistsError("Could not allocate a project directory; run `python -m backend.project_index rebuild`.")
+
+    try:
+        job_title_dir = project_dir / "job_title"
+        job_desc_dir = project_dir / "job_desc"
+        job_title_dir.mkdir()
+        job_desc_dir.mkdir()
+
+        title_path = job_title_dir / "title.txt"
+        title_path.write_text(title_text + ("\n" if title_text else ""), encoding="utf-8")
+
+        safe_name = _sanitize_filename(job_desc_filename)
+        job_desc_path = job_desc_dir / safe_name
+        _store_artifact(
+            project_id, "job_desc", _as_stream(job_desc), job_desc_path, empty_error="Uploaded job description is empty."
+        )
+    except BaseException:
+        shutil.rmtree(project_dir, ignore_errors=True)
+        index.release(project_id)
+        raise
+
+    title_bytes = title_path.read_bytes()
+    index.record_artifact(project_id, "job_title", title_path, hashlib.sha256(title_bytes).hexdigest(), len(title_bytes))
 
     return {
         "id": project_id,
@@ -70,73 +131,79 @@ def create_project_workspace(job_title: str, job_desc_bytes: bytes, job_desc_fil
     }
 
 
-def save_original_resume(resume_bytes: bytes, resume_filename: str | None = None) -> Dict[str, str | int]:
-    """Persist the uploaded resume into the latest project directory under orig_resume."""
+def save_original_resume(
+    resume: bytes | BinaryIO, resume_filename: str | None = None, project_id: int | None = None
+) -> Dict[str, str | int]:
+    """Persist the uploaded resume under orig_resume of ``project_id`` (default: the latest project).
 
-    if not resume_bytes:
-        raise ValueError("Uploaded resume is empty.")
+    ``resume`` may be bytes or an open binary file, which is streamed to disk.
+    """
 
-    PROJECTS_ROOT.mkdir(parents=True, exist_ok=True)
-    project_id, project_dir = _latest_project_dir(PROJECTS_ROOT)
+    project_id, project_dir = _project_dir(project_id)
 
     resume_dir = project_dir / "orig_resume"
     resume_dir.mkdir(parents=True, exist_ok=True)
 
     safe_name = _sanitize_filename(resume_filename, default="resume_upload")
     resume_path = resume_dir / safe_name
-    resume_path.write_bytes(resume_bytes)
+    resume_hash, resume_size = _store_artifact(
+        project_id, "orig_resume", _as_stream(resume), resume_path, empty_error="Uploaded resume is empty."
+    )
 
     return {
         "id": project_id,
         "orig_resume_path": str(resume_path),
         "resume_filename": safe_name,
+        "sha256": resume_hash,
+        "size": resume_size,
     }
 
 
-def replace_job_description(job_description: str) -> Dict[str, str | int]:
-    """Replace the latest project's job description contents with provided text."""
+def replace_job_description(job_description: str, project_id: int | None = None) -> Dict[str, str | int]:
+    """Replace the job description of ``project_id`` (default: the latest project) with provided text."""
 
     if not job_description.strip():
         raise ValueError("Job description text is empty.")
 
-    PROJECTS_ROOT.mkdir(parents=True, exist_ok=True)
-    project_id, project_dir = _latest_project_dir(PROJECTS_ROOT)
+    project_id, project_dir = _project_dir(project_id)
 
     job_desc_dir = project_dir / "job_desc"
     job_desc_dir.mkdir(parents=True, exist_ok=True)
 
-    # Remove existing files before writing the new tailored text
+    job_desc_path = job_desc_dir / "job_description.txt"
+    _store_artifact(project_id, "job_desc", io.BytesIO(job_description.encode("utf-8")), job_desc_path)
+
+    # Remove the original upload now that the new tailored text is in place
     for path in job_desc_dir.iterdir():
-        if path.is_file():
+        if path.is_file() and path != job_desc_path and not path.name.startswith("."):
             path.unlink()
 
-    job_desc_path = job_desc_dir / "job_description.txt"
-    job_desc_path.write_text(job_description, encoding="utf-8")
-
     return {
         "id": project_id,
         "job_desc_path": str(job_desc_path),
     }
 
 
-def load_latest_job_description() -> Tuple[int, str]:
-    """Return the latest project id and its job description text."""
-
-    PROJECTS_ROOT.mkdir(parents=True, exist_ok=True)
-    project_id, project_dir = _latest_project_dir(PROJECTS_ROOT)
-
-    job_desc_dir = project_dir / "job_desc"
-    if not job_desc_dir.is_dir():
-        raise FileNotFoundError("Latest project has no job description directory.")
+def load_job_description(project_id: int | None = None) -> Tuple[int, str]:
+    """Return the id and job description text of ``project_id`` (default: the latest project)."""
 
-    job_desc_files = [path for path in job_desc_dir.iterdir() if path.is_file()]
-    if not job_desc_files:
-        raise FileNotFoundError("Job description directory is empty.")
+    project_id, _ = _project_dir(project_id)
 
-    job_desc_files.sort(key=lambda path: path.stat().st_mtime, reverse=True)
-    job_desc_path = job_desc_files[0]
+    artifact = get_project_index().artifact(project_id, "job_desc")
+    if artifact is None:
+        raise FileNotFoundError(f"Project {project_id} has no job description.")
+    job_desc_path = Path(artifact["path"])
+    if not job_desc_path.is_file():
+        raise FileNotFoundError(
+            f"Job description of project {project_id} is missing; run `python -m backend.project_index rebuild`."
+        )
     contents = job_desc_path.read_text(encoding="utf-8").strip()
     if not contents:
-        raise ValueError("Latest job description file is empty.")
+        raise ValueError(f"Job description of project {project_id} is empty.")
 
     return project_id, contents
+
+
+def load_latest_job_description() -> Tuple[int, str]:
+    """Return the latest project id and its job description text."""
+    return load_job_description()
@@ -0,0 +1,207 @@
+"""Nearest-neighbour search backends over normalized corpus embeddings.
+
+``ExactIndex`` scores every row and is the reference for recall checks.
+``IVFIndex`` clusters the corpus around coarse centroids (spherical k-means)
+and only scores the rows in the ``nprobe`` lists closest to the query, so
+``nprobe`` trades recall for latency.
+
+Both score against a ``quantization`` store. When the store is lossy, the
+best ``k * rerank`` candidates are rescored with the float32 rows.
+"""
+from __future__ import annotations
+
+import io
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .embedding_store import atomic_write
+from .quantization import DenseStore
+
+# Exact unless a deployment opts in to "ivf" after checking its recall on the
+# real bank with backend/test/technical_questions/ann_recall_benchmark.py.
+DEFAULT_BACKEND = os.getenv("QUESTION_SEARCH_BACKEND", "exact")
+DEFAULT_NPROBE = int(os.getenv("QUESTION_SEARCH_NPROBE", "8"))
+DEFAULT_RERANK = int(os.getenv("QUESTION_SEARCH_RERANK", "4"))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the ``k`` highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class _Searcher:
+    def __init__(self, embeddings: np.ndarray, store: DenseStore | None = None, rerank: int = DEFAULT_RERANK):
+        # Float32 rows; only touched for training and reranking when ``store`` is compact.
+        self.embeddings = embeddings
+        self.store = store if store is not None else DenseStore(embeddings)
+        self.rerank = rerank if self.store.lossy else 0
+
+    def _select(self, query: np.ndarray, candidates: np.ndarray, scores: np.ndarray, k: int, available: int) -> list[int]:
+        """Pick the top ``k`` candidates by ``scores``, reranking a shortlist in float32 if enabled."""
+        if not self.rerank:
+            return candidates[top_k(scores, min(k, available))].tolist()
+
+        shortlist = np.sort(candidates[top_k(scores, min(k * self.rerank, available))])
+        exact = self.embeddings[shortlist] @ query
+        return shortlist[top_k(exact, k)].tolist()
+
+    def search_rows(self, query: np.ndarray, k: int, rows: np.ndarray) -> list[int]:
+        """Exact search restricted to ``rows`` (sorted ids); cost scales with the subset, not the corpus."""
+        if rows.size == 0:
+            return []
+        return self._select(query, rows, self.store.score(query, rows), k, rows.size)
+
+
+class ExactIndex(_Searcher):
+    """Brute-force dot product against every corpus row."""
+
+    name = "exact"
+
+    def search(self, query: np.ndarray, k: int) -> list[int]:
+        candidates = np.arange(len(self.store))
+        return self._select(query, candidates, self.store.score(query), k, candidates.size)
+
+    def search_batch(self, queries: np.ndarray, ks: list[int]) -> list[list[int]]:
+        """Score all queries with one (queries x corpus) matrix product."""
+        candidates = np.arange(len(self.store))
+        scores = self.store.score(queries)
+        return [self._select(query, candidates, row, k, candidates.size) for query, row, k in zip(queries, scores, ks)]
+
+
+class IVFIndex(_Searcher):
+    """Inverted-file index: rows bucketed by nearest coarse centroid."""
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        nprobe: int = DEFAULT_NPROBE,
+        store: DenseStore | None = None,
+        rerank: int = DEFAULT_RERANK,
+    ):
+        super().__init__(embeddings, store=store, rerank=rerank)
+        self.centroids = centroids
+        # Rows of list ``i`` are ids[offsets[i]:offsets[i + 1]].
+        self.offsets = offsets
+        self.ids = ids
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, n_lists: int | None = None, iterations: int = 20, seed: int = 0, **kwargs) -> "IVFIndex":
+        rows = embeddings.shape[0]
+        n_lists = max(1, min(n_lists or int(math.sqrt(rows)), rows))
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample; assignment below still covers every row.
+        sample_size = min(rows, n_lists * 256)
+        sample = np.asarray(embeddings[np.sort(rng.choice(rows, size=sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+                else:
+                    # Re-seed empty clusters instead of leaving dead lists.
+                    centroids[cluster] = sample[rng.integers(sample_size)]
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+
+        assignment = _assign(embeddings, centroids)
+        ids = np.argsort(assignment, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=n_lists)
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(embeddings, centroids.astype(np.float32), offsets, ids, **kwargs)
+
+    def _candidates(self, probes: np.ndarray) -> np.ndarray:
+        if probes.size == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.ids[self.offsets[i]:self.offsets[i + 1]] for i in probes])
+
+    def search(self, query: np.ndarray, k: int, nprobe: int | None = None) -> list[int]:
+        candidates = self._candidates(top_k(self.centroids @ query, nprobe or self.nprobe))
+        if candidates.size == 0:
+            return []
+        candidates.sort()  # sequential reads from the memory-mapped matrix
+        return self._select(query, candidates, self.store.score(query, candidates), k, candidates.size)
+
+    def search_batch(self, queries: np.ndarray, ks: list[int], nprobe: int | None = None) -> list[list[int]]:
+        """
+        Probe lists per query, then score every query against the union of the
+        probed rows with one matrix product, masking rows outside its own lists.
+        """
+        probes = [top_k(row, nprobe or self.nprobe) for row in queries @ self.centroids.T]
+        candidates = [self._candidates(lists) for lists in probes]
+        union = np.unique(np.concatenate(candidates)) if candidates else np.empty(0, dtype=np.int64)
+        if union.size == 0:
+            return [[] for _ in ks]
+
+        scores = self.store.score(queries, union)
+        results = []
+        for query, row, own, k in zip(queries, scores, candidates, ks):
+            masked = np.where(np.isin(union, own), row, -np.inf)
+            results.append(self._select(query, union, masked, k, own.size))
+        return results
+
+    def save(self, path: Path) -> None:
+        buffer = io.BytesIO()
+        np.savez(buffer, centroids=self.centroids, offsets=self.offsets, ids=self.ids)
+        atomic_write(path, lambda handle: handle.write(buffer.getvalue()))
+
+    @classmethod
+    def load(cls, path: Path, embeddings: np.ndarray, **kwargs) -> "IVFIndex | None":
+        try:
+            with np.load(path) as data:
+                centroids, offsets, ids = data["centroids"], data["offsets"], data["ids"]
+        except (OSError, ValueError, KeyError):
+            return None
+        if ids.shape[0] != embeddings.shape[0] or centroids.shape[1] != embeddings.shape[1]:
+            return None
+        return cls(embeddings, centroids, offsets, ids, **kwargs)
+
+
+def _assign(embeddings: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    assignment = np.empty(embeddings.shape[0], dtype=np.int64)
+    for start in range(0, embeddings.shape[0], batch_size):
+        block = np.asarray(embeddings[start:start + batch_size])
+        assignment[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def load_or_build(
+    backend: str,
+    embeddings: np.ndarray,
+    directory: Path,
+    nprobe: int = DEFAULT_NPROBE,
+    store: DenseStore | None = None,
+    rerank: int = DEFAULT_RERANK,
+):
+    """Return the requested search backend, reusing an IVF index persisted in ``directory``."""
+    if backend == ExactIndex.name:
+        return ExactIndex(embeddings, store=store, rerank=rerank)
+    if backend != IVFIndex.name:
+        raise ValueError(f"Unknown search backend '{backend}'. Expected 'exact' or 'ivf'.")
+
+    path = directory / "ivf.npz"
+    options = {"nprobe": nprobe, "store": store, "rerank": rerank}
+    index = IVFIndex.load(path, embeddings, **options)
+    if index is None:
+        index = IVFIndex.build(embeddings, **options)
+        index.save(path)
+    return index
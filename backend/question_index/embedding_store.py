@@ -0,0 +1,117 @@
+"""Persist corpus embeddings on disk and memory-map them back in.
+
+Each cache entry lives in its own directory named after the cache key (model
+name, dataset content hash, embedding dimension) and holds ``embeddings.npy``
+plus a ``manifest.json`` written last, so a half-written entry is never used.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+CACHE_ROOT = Path(
+    os.getenv("QUESTION_INDEX_CACHE_DIR", Path(__file__).resolve().parents[1] / "cache" / "question_index")
+)
+_EMBEDDINGS_FILE = "embeddings.npy"
+_MANIFEST_FILE = "manifest.json"
+
+
+def dataset_hash(texts: Iterable[str]) -> str:
+    """Hash corpus texts in order; any edit, insertion or reordering changes it."""
+    digest = hashlib.sha256()
+    for text in texts:
+        encoded = str(text).encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    model_name: str
+    dataset_hash: str
+    dim: int
+
+    @property
+    def slug(self) -> str:
+        raw = f"{self.model_name}|{self.dataset_hash}|{self.dim}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()[:24]
+
+
+def entry_dir(key: CacheKey, root: Path = CACHE_ROOT) -> Path:
+    return root / key.slug
+
+
+def load(key: CacheKey, rows: int, root: Path = CACHE_ROOT) -> np.ndarray | None:
+    """Memory-map a cached matrix, or return None if it is missing, stale or corrupt."""
+    directory = entry_dir(key, root)
+    manifest_path = directory / _MANIFEST_FILE
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    expected = {**asdict(key), "rows": rows}
+    if any(manifest.get(name) != value for name, value in expected.items()):
+        return None
+
+    try:
+        matrix = np.load(directory / _EMBEDDINGS_FILE, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    if matrix.shape != (rows, key.dim) or matrix.dtype != np.float32:
+        return None
+    return matrix
+
+
+def save(key: CacheKey, embeddings: np.ndarray, root: Path = CACHE_ROOT) -> Path:
+    """Write embeddings and their manifest atomically (temp file + rename)."""
+    directory = entry_dir(key, root)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    atomic_write(directory / _EMBEDDINGS_FILE, lambda handle: np.save(handle, matrix))
+
+    manifest = {**asdict(key), "rows": int(matrix.shape[0]), "dtype": "float32", "created_at": time.time()}
+    payload = json.dumps(manifest, indent=2).encode("utf-8")
+    atomic_write(directory / _MANIFEST_FILE, lambda handle: handle.write(payload))
+    return directory
+
+
+def load_or_build(
+    key: CacheKey,
+    texts: list[str],
+    encode: Callable[[list[str]], np.ndarray],
+    root: Path = CACHE_ROOT,
+) -> np.ndarray:
+    """Return the memory-mapped matrix for ``key``, encoding and caching it on a miss."""
+    cached = load(key, len(texts), root)
+    if cached is not None:
+        return cached
+
+    save(key, encode(texts), root)
+    matrix = load(key, len(texts), root)
+    if matrix is None:
+        raise RuntimeError(f"Embedding cache at {entry_dir(key, root)} could not be read back.")
+    return matrix
+
+
+def atomic_write(path: Path, write: Callable) -> None:
+    """Write ``path`` through a temp file in the same directory and an atomic rename."""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "wb") as handle:
+            write(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
@@ -0,0 +1,85 @@
+"""Inverted index from difficulty and tag values to corpus row ids.
+
+A filter matches rows whose difficulty is any of the requested difficulties
+and which carry any of the requested tags; an empty list leaves that field
+unconstrained. Matching is case-insensitive.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class QuestionFilter:
+    difficulties: tuple[str, ...] = field(default_factory=tuple)
+    tags: tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def create(cls, difficulties: list[str] | None = None, tags: list[str] | None = None) -> "QuestionFilter | None":
+        """Build a filter from request fields, or None when nothing is constrained."""
+        question_filter = cls(
+            difficulties=tuple(value.strip() for value in difficulties or [] if value.strip()),
+            tags=tuple(value.strip() for value in tags or [] if value.strip()),
+        )
+        return None if question_filter.is_empty else question_filter
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.difficulties and not self.tags
+
+
+class FilterIndex:
+    def __init__(self, postings: dict[str, dict[str, np.ndarray]], names: dict[str, dict[str, str]]):
+        # postings[field][normalized value] -> sorted row ids
+        self.postings = postings
+        # names[field][normalized value] -> value as spelled in the dataset
+        self.names = names
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "FilterIndex":
+        rows: dict[str, dict[str, list[int]]] = {"difficulty": {}, "tags": {}}
+        names: dict[str, dict[str, str]] = {"difficulty": {}, "tags": {}}
+
+        for row_id, (difficulty, tags) in enumerate(zip(df["difficulty"], df["tags"])):
+            values = {"difficulty": [difficulty] if isinstance(difficulty, str) else [], "tags": _as_list(tags)}
+            for name, field_values in values.items():
+                for value in field_values:
+                    key = value.strip().lower()
+                    rows[name].setdefault(key, []).append(row_id)
+                    names[name].setdefault(key, value.strip())
+
+        postings = {
+            name: {key: np.unique(np.asarray(ids, dtype=np.int64)) for key, ids in by_value.items()}
+            for name, by_value in rows.items()
+        }
+        return cls(postings, names)
+
+    def match(self, question_filter: QuestionFilter) -> np.ndarray:
+        """Sorted row ids matching ``question_filter``."""
+        matched: np.ndarray | None = None
+        for name, values in (("difficulty", question_filter.difficulties), ("tags", question_filter.tags)):
+            if not values:
+                continue
+            lists = [self.postings[name].get(value.strip().lower()) for value in values]
+            lists = [ids for ids in lists if ids is not None]
+            ids = np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+            matched = ids if matched is None else np.intersect1d(matched, ids, assume_unique=True)
+        return matched if matched is not None else np.empty(0, dtype=np.int64)
+
+    def values(self) -> dict[str, dict[str, int]]:
+        """Every filterable value with the number of problems carrying it."""
+        return {
+            name: {self.names[name][key]: int(ids.size) for key, ids in sorted(by_value.items())}
+            for name, by_value in self.postings.items()
+        }
+
+
+def _as_list(value) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    if value is None:
+        return []
+    return [item for item in value if isinstance(item, str)]
@@ -0,0 +1,160 @@
+"""BM25 lexical index over problem text, stored as compact postings lists.
+
+Postings are kept in CSR form: the documents containing term ``t`` are
+``doc_ids[offsets[t]:offsets[t + 1]]``, and next to each one is its
+precomputed BM25 term weight, so scoring a query is one gather-and-add per
+query term. ``fuse`` blends the lexical scores with embedding scores.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from .embedding_store import atomic_write
+
+DEFAULT_WEIGHT = float(os.getenv("QUESTION_SEARCH_LEXICAL_WEIGHT", "0.3"))
+
+# Keeps technology names such as "c++" and "c#" intact.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\+\+|#)?")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in is it its of on or that the this to was we will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        vocabulary: dict[str, int],
+        idf: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        rows: int,
+        average_length: float = 1.0,
+    ):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.rows = rows
+        self.average_length = average_length
+
+    @classmethod
+    def build(
+        cls, documents: list[str], k1: float = 1.2, b: float = 0.75, reference: "LexicalIndex | None" = None
+    ) -> "LexicalIndex":
+        """
+        Index ``documents``. With ``reference``, idf and the average document
+        length come from that index instead, so scores of the two are on the same
+        scale (used for the edit log next to the base corpus).
+        """
+        term_counts = [Counter(tokenize(document)) for document in documents]
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+        if reference is not None:
+            average_length = reference.average_length
+        else:
+            average_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for doc_id, counts in enumerate(term_counts):
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((doc_id, count))
+
+        terms = sorted(postings)
+        vocabulary = {term: position for position, term in enumerate(terms)}
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        weights = np.empty(offsets[-1], dtype=np.float32)
+        document_frequency = np.empty(len(terms), dtype=np.float32)
+
+        for position, term in enumerate(terms):
+            ids, counts = zip(*postings[term])
+            tf = np.asarray(counts, dtype=np.float32)
+            norm = k1 * (1 - b + b * lengths[list(ids)] / average_length)
+            start, stop = offsets[position], offsets[position + 1]
+            doc_ids[start:stop] = ids
+            weights[start:stop] = tf * (k1 + 1) / (tf + norm)
+            document_frequency[position] = len(ids)
+
+        rows = len(documents)
+        if reference is not None:
+            # Terms the reference has never seen get its idf for a document frequency of zero.
+            unseen = np.log(1 + (reference.rows + 0.5) / 0.5)
+            idf = np.array(
+                [reference.idf[reference.vocabulary[term]] if term in reference.vocabulary else unseen for term in terms],
+                dtype=np.float32,
+            )
+        else:
+            idf = np.log(1 + (rows - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        return cls(vocabulary, idf, offsets, doc_ids, weights, rows, average_length)
+
+    def score(self, text: str) -> np.ndarray:
+        """BM25 score of every row for ``text`` (zero for rows sharing no term)."""
+        scores = np.zeros(self.rows, dtype=np.float32)
+        for term in set(tokenize(text)):
+            position = self.vocabulary.get(term)
+            if position is None:
+                continue
+            start, stop = self.offsets[position], self.offsets[position + 1]
+            # Each document appears at most once per term, so plain fancy-index addition is safe.
+            scores[self.doc_ids[start:stop]] += self.idf[position] * self.weights[start:stop]
+        return scores
+
+    def save(self, path: Path) -> None:
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get), dtype=np.str_)
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            terms=terms,
+            idf=self.idf,
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            average_length=np.float32(self.average_length),
+        )
+        atomic_write(path, lambda handle: handle.write(buffer.getvalue()))
+
+    @classmethod
+    def load(cls, path: Path, rows: int) -> "LexicalIndex | None":
+        try:
+            with np.load(path) as data:
+                terms, idf, offsets = data["terms"], data["idf"], data["offsets"]
+                doc_ids, weights = data["doc_ids"], data["weights"]
+                average_length = float(data["average_length"])
+        except (OSError, ValueError, KeyError):
+            return None
+        if doc_ids.size and int(doc_ids.max()) >= rows:
+            return None
+        vocabulary = {str(term): position for position, term in enumerate(terms)}
+        return cls(vocabulary, idf, offsets, doc_ids, weights, rows, average_length)
+
+
+def load_or_build(documents, rows: int, directory: Path) -> LexicalIndex:
+    """Load the persisted index, calling ``documents()`` for the corpus text only on a miss."""
+    path = directory / "lexical.npz"
+    index = LexicalIndex.load(path, rows)
+    if index is None:
+        index = LexicalIndex.build(documents())
+        index.save(path)
+    return index
+
+
+def fuse(semantic: np.ndarray, lexical: np.ndarray, weight: float) -> np.ndarray:
+    """
+    Blend scores for the same candidates: cosine similarity plus ``weight``
+    times the BM25 score scaled to [0, 1] by the best candidate.
+    """
+    best = float(lexical.max()) if lexical.size else 0.0
+    scaled = lexical / best if best > 0 else lexical
+    return (1 - weight) * semantic + weight * scaled
@@ -0,0 +1,122 @@
+"""Compact storage for corpus embeddings.
+
+``float16`` halves the matrix; ``int8`` quarters it by storing each row as
+int8 codes plus one float32 scale (``row ~= codes * scale``). Scoring
+dequantizes fixed-size blocks on the fly, so only one block is ever expanded
+to float32 at a time.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .embedding_store import atomic_write
+
+DEFAULT_DTYPE = os.getenv("QUESTION_EMBEDDING_DTYPE", "float32")
+_BLOCK_ROWS = 16384
+
+
+class DenseStore:
+    """Float32 rows, scored as-is."""
+
+    dtype = "float32"
+    lossy = False
+
+    def __init__(self, embeddings: np.ndarray):
+        self.embeddings = embeddings
+
+    @property
+    def nbytes(self) -> int:
+        return self.embeddings.nbytes
+
+    def rows(self, index) -> np.ndarray:
+        return np.asarray(self.embeddings[index], dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.embeddings.shape[0]
+
+    def score(self, queries: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Dot products of ``queries`` (one vector or a matrix) with the selected rows."""
+        count = len(self) if rows is None else len(rows)
+        out = np.empty((count,) if queries.ndim == 1 else (queries.shape[0], count), dtype=np.float32)
+        for start in range(0, count, _BLOCK_ROWS):
+            stop = min(start + _BLOCK_ROWS, count)
+            block = self.rows(slice(start, stop) if rows is None else rows[start:stop])
+            out[..., start:stop] = queries @ block.T
+        return out
+
+
+class Float16Store(DenseStore):
+    dtype = "float16"
+    lossy = True
+
+    def __init__(self, codes: np.ndarray):
+        super().__init__(codes)
+
+    @classmethod
+    def quantize(cls, embeddings: np.ndarray) -> "Float16Store":
+        return cls(np.asarray(embeddings, dtype=np.float16))
+
+
+class Int8Store(DenseStore):
+    dtype = "int8"
+    lossy = True
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray):
+        super().__init__(codes)
+        self.scales = scales
+
+    @property
+    def nbytes(self) -> int:
+        return self.embeddings.nbytes + self.scales.nbytes
+
+    @classmethod
+    def quantize(cls, embeddings: np.ndarray) -> "Int8Store":
+        codes = np.empty(embeddings.shape, dtype=np.int8)
+        scales = np.empty(embeddings.shape[0], dtype=np.float32)
+        for start in range(0, embeddings.shape[0], _BLOCK_ROWS):
+            block = np.asarray(embeddings[start:start + _BLOCK_ROWS], dtype=np.float32)
+            block_scales = np.abs(block).max(axis=1) / 127.0
+            block_scales[block_scales == 0] = 1.0
+            codes[start:start + len(block)] = np.round(block / block_scales[:, None]).astype(np.int8)
+            scales[start:start + len(block)] = block_scales
+        return cls(codes, scales)
+
+    def rows(self, index) -> np.ndarray:
+        return self.embeddings[index].astype(np.float32) * self.scales[index][..., None]
+
+
+def load_or_build(dtype: str, embeddings: np.ndarray, directory: Path) -> DenseStore:
+    """Return ``embeddings`` in the requested storage type, memory-mapping a persisted copy."""
+    if dtype == "float32":
+        return DenseStore(embeddings)
+    if dtype not in ("float16", "int8"):
+        raise ValueError(f"Unknown embedding dtype '{dtype}'. Expected 'float32', 'float16' or 'int8'.")
+
+    codes_path = directory / f"embeddings.{dtype}.npy"
+    scales_path = directory / "scales.int8.npy"
+    store = _load(dtype, codes_path, scales_path, embeddings.shape)
+    if store is None:
+        store = Float16Store.quantize(embeddings) if dtype == "float16" else Int8Store.quantize(embeddings)
+        if dtype == "int8":
+            atomic_write(scales_path, lambda handle: np.save(handle, store.scales))
+        atomic_write(codes_path, lambda handle: np.save(handle, store.embeddings))
+        store = _load(dtype, codes_path, scales_path, embeddings.shape)
+    return store
+
+
+def _load(dtype: str, codes_path: Path, scales_path: Path, shape: tuple) -> DenseStore | None:
+    try:
+        codes = np.load(codes_path, mmap_mode="r")
+        scales = np.load(scales_path, mmap_mode="r") if dtype == "int8" else None
+    except (OSError, ValueError):
+        return None
+    if codes.shape != shape or codes.dtype != np.dtype(dtype):
+        return None
+    if scales is None:
+        return Float16Store(codes)
+    if scales.shape != (shape[0],):
+        return None
+    return Int8Store(codes, scales)
@@ -0,0 +1,80 @@
+"""Bounded LRU cache for job-description embeddings.
+
+Entries are keyed by a hash of the model name and the whitespace-normalized
+text, and evicted least-recently-used first once their total size exceeds
+``max_bytes``.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = int(os.getenv("QUERY_EMBEDDING_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+
+def cache_key(model_name: str, text: str) -> str:
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingLRUCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)  # shared between requests
+        size = _entry_size(key, embedding)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= _entry_size(key, previous)
+            self._entries[key] = embedding
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                old_key, old_embedding = self._entries.popitem(last=False)
+                self.current_bytes -= _entry_size(old_key, old_embedding)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _entry_size(key: str, embedding: np.ndarray) -> int:
+    return embedding.nbytes + len(key)
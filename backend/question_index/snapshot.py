@@ -0,0 +1,193 @@
+"""Local columnar snapshot of the LeetCode dataset.
+
+Converts the JSONL dataset (a local file or an ``hf://`` URL) into a Parquet file
+so the server can start without network access, read only the columns it needs,
+and fetch heavy per-problem fields for just the rows it returns.
+
+Usage::
+
+    python -m backend.question_index.snapshot import --source LeetCodeDataset-train.jsonl
+    python -m backend.question_index.snapshot verify
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .embedding_store import atomic_write
+
+SNAPSHOT_ROOT = Path(os.getenv("QUESTION_DATASET_DIR", Path(__file__).resolve().parents[1] / "data"))
+DEFAULT_SOURCE = "hf://datasets/newfacade/LeetCodeDataset/LeetCodeDataset-train.jsonl"
+
+# Needed for every search (embedding, titles, filters).
+EAGER_COLUMNS = ["task_id", "difficulty", "tags", "query"]
+# Only needed for the handful of problems returned to the caller.
+LAZY_COLUMNS = ["problem_description", "starter_code", "input_output"]
+COLUMNS = EAGER_COLUMNS + LAZY_COLUMNS
+
+# Small row groups keep a lazy fetch of k rows down to k small reads.
+_ROW_GROUP_SIZE = 256
+_HASH_METADATA_KEY = b"recruit.content_sha256"
+
+
+def snapshot_path(split: str = "train", root: Path = SNAPSHOT_ROOT) -> Path:
+    return root / f"leetcode-{split}.parquet"
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Hash the projected rows independently of the storage format."""
+    digest = hashlib.sha256()
+    for record in df[COLUMNS].to_dict(orient="records"):
+        digest.update(json.dumps(record, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def import_jsonl(source: str, dest: Path) -> dict:
+    """Convert a JSONL dataset into a Parquet snapshot plus a JSON manifest."""
+    df = pd.read_json(source, lines=True)
+    missing = [column for column in COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing required columns: {missing}")
+
+    df = df[COLUMNS].reset_index(drop=True)
+    sha256 = content_hash(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _HASH_METADATA_KEY: sha256.encode()})
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(dest, lambda handle: pq.write_table(table, handle, row_group_size=_ROW_GROUP_SIZE))
+
+    manifest = {
+        "source": source,
+        "sha256": sha256,
+        "rows": len(df),
+        "file_bytes": dest.stat().st_size,
+        "columns": COLUMNS,
+        "created_at": time.time(),
+    }
+    payload = json.dumps(manifest, indent=2).encode("utf-8")
+    atomic_write(dest.with_suffix(".json"), lambda handle: handle.write(payload))
+    return manifest
+
+
+class Snapshot:
+    """Read access to a Parquet snapshot written by ``import_jsonl``."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = pq.ParquetFile(path)
+        metadata = self._file.metadata
+        self.sha256 = (self._file.schema_arrow.metadata or {}).get(_HASH_METADATA_KEY, b"").decode()
+        # First row id of each row group, for mapping row ids to row groups.
+        self._group_starts = []
+        start = 0
+        for group in range(metadata.num_row_groups):
+            self._group_starts.append(start)
+            start += metadata.row_group(group).num_rows
+        self.rows = start
+
+    def check_manifest(self) -> None:
+        """Raise ``ValueError`` if the file's size or row count differs from its manifest.
+
+        Cheap enough for every start: it reads no rows. ``verify`` re-hashes the content.
+        """
+        manifest_path = self.path.with_suffix(".json")
+        if not manifest_path.is_file():
+            return
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        actual = {"rows": self.rows, "file_bytes": self.path.stat().st_size}
+        for key, value in actual.items():
+            if key in manifest and manifest[key] != value:
+                raise ValueError(
+                    f"Snapshot {self.path} does not match its manifest ({key} {value}, expected {manifest[key]}); "
+                    "re-run the import."
+                )
+
+    def verify(self) -> None:
+        """Raise ``ValueError`` unless the rows hash to the ``sha256`` recorded at import.
+
+        Reads every column of every row, so it is run on demand (``snapshot verify``)
+        rather than on each start.
+        """
+        if not self.sha256:
+            raise ValueError(f"Snapshot {self.path} has no content hash; re-run the import.")
+        actual = content_hash(self.load(COLUMNS))
+        if actual != self.sha256:
+            raise ValueError(f"Snapshot {self.path} is corrupt (sha256 {actual}, expected {self.sha256}); re-run the import.")
+
+    def load(self, columns: list[str] = EAGER_COLUMNS) -> pd.DataFrame:
+        """Read only ``columns`` for every row."""
+        table = self._file.read(columns=columns)
+        df = table.to_pandas()
+        for name in columns:
+            # Keep list columns (tags) as Python lists, as pd.read_json returns them.
+            if pa.types.is_list(table.schema.field(name).type):
+                df[name] = table.column(name).to_pylist()
+        return df
+
+    def fetch(self, row_ids: list[int], columns: list[str] = LAZY_COLUMNS) -> dict[int, dict]:
+        """Read ``columns`` for ``row_ids`` only, touching just the row groups that hold them."""
+        by_group: dict[int, list[int]] = {}
+        for row_id in row_ids:
+            if not 0 <= row_id < self.rows:
+                raise IndexError(f"Row {row_id} is outside the snapshot ({self.rows} rows).")
+            by_group.setdefault(bisect_right(self._group_starts, row_id) - 1, []).append(row_id)
+
+        fetched: dict[int, dict] = {}
+        for group, ids in by_group.items():
+            table = self._file.read_row_group(group, columns=columns)
+            offsets = [row_id - self._group_starts[group] for row_id in ids]
+            for row_id, record in zip(ids, table.take(offsets).to_pylist()):
+                fetched[row_id] = record
+        return fetched
+
+
+def open_snapshot(split: str = "train", root: Path = SNAPSHOT_ROOT, verify: bool = False) -> Snapshot | None:
+    """Open the snapshot for ``split`` if one was imported.
+
+    The file is checked against its manifest; ``verify=True`` also re-hashes the content.
+    """
+    path = snapshot_path(split, root)
+    if not path.is_file():
+        return None
+    dataset = Snapshot(path)
+    dataset.check_manifest()
+    if verify:
+        dataset.verify()
+    return dataset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the local LeetCode dataset snapshot.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Convert a JSONL dataset into a Parquet snapshot.")
+    import_parser.add_argument("--source", default=DEFAULT_SOURCE, help=f"JSONL path or URL (default: {DEFAULT_SOURCE}).")
+    import_parser.add_argument("--split", default="train", help="Split name used for the snapshot filename.")
+    import_parser.add_argument("--dest", type=Path, help="Output path (default: backend/data/leetcode-<split>.parquet).")
+    verify_parser = commands.add_parser("verify", help="Re-hash a snapshot and compare it with the import hash.")
+    verify_parser.add_argument("--split", default="train", help="Split name used for the snapshot filename.")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        dest = args.dest or snapshot_path(args.split)
+        manifest = import_jsonl(args.source, dest)
+        print(f"Wrote {manifest['rows']} rows to {dest} (sha256 {manifest['sha256']}).")
+    elif args.command == "verify":
+        dataset = open_snapshot(args.split, verify=True)
+        if dataset is None:
+            raise SystemExit(f"No snapshot at {snapshot_path(args.split)}; run the import first.")
+        print(f"{dataset.path}: {dataset.rows} rows match sha256 {dataset.sha256}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Incremental edits to the problem bank, layered over the base dataset.
+
+Edits are stored in an append-only log under ``backend/data/custom/<split>``:
+
+- ``problems.<generation>.jsonl``: one line per edit. An upsert line holds the
+  full problem plus the ``row`` of its embedding; a delete line is
+  ``{"task_id": ..., "deleted": true}``.
+- ``embeddings.<generation>.f32``: raw float32 rows, appended in place, one per upsert.
+- ``manifest.json``: version, generation, record/row counts and byte lengths.
+  It is replaced atomically after the data is appended and fsynced, so readers
+  only ever see complete versions and pick up a new one by noticing the replace.
+
+``compact`` writes a new generation holding only live rows.
+
+The latest line for a ``task_id`` wins. Any ``task_id`` that has been edited
+hides the base-dataset row with the same id. Only upserted rows are encoded.
+
+Usage::
+
+    python -m backend.question_index.updates apply --upsert new_problems.jsonl --delete two-sum
+    python -m backend.question_index.updates status
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from .embedding_store import atomic_write
+from .snapshot import SNAPSHOT_ROOT
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer deployments only
+    fcntl = None
+
+DELTA_ROOT = Path(os.getenv("QUESTION_DELTA_DIR", SNAPSHOT_ROOT / "custom"))
+_MANIFEST_FILE = "manifest.json"
+_LOCK_FILE = ".lock"
+
+_TEXT_FIELDS = ("task_id", "query", "difficulty")
+_DEFAULTS = {"tags": [], "problem_description": "", "starter_code": "", "input_output": []}
+
+
+def delta_dir(split: str = "train", root: Path = DELTA_ROOT) -> Path:
+    return root / split
+
+
+@dataclass(frozen=True)
+class DeltaState:
+    version: int
+    model_name: str
+    dim: int
+    # One record per appended embedding row; superseded and deleted ones included.
+    problems: list[dict]
+    embeddings: np.ndarray
+    # task_id -> embedding row of its live version.
+    live: dict[str, int]
+    # Every task_id with at least one edit; these hide base rows.
+    touched: frozenset[str]
+
+
+def stamp(directory: Path) -> tuple[int, int] | None:
+    """Cheap change marker for the manifest (inode and mtime change on every replace)."""
+    try:
+        info = (directory / _MANIFEST_FILE).stat()
+    except FileNotFoundError:
+        return None
+    return info.st_ino, info.st_mtime_ns
+
+
+def load(directory: Path) -> DeltaState | None:
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        return None
+
+    log_path, embeddings_path = _paths(manifest, directory)
+    with open(log_path, "rb") as handle:
+        lines = handle.read(manifest["log_bytes"]).decode("utf-8").splitlines()
+
+    rows, dim = manifest["rows"], manifest["dim"]
+    if rows:
+        embeddings = np.memmap(embeddings_path, dtype=np.float32, mode="r", shape=(rows, dim))
+    else:
+        embeddings = np.empty((0, dim), dtype=np.float32)
+
+    problems: list[dict] = []
+    live: dict[str, int] = {}
+    touched: set[str] = set()
+    for line in lines[: manifest["records"]]:
+        record = json.loads(line)
+        task_id = record["task_id"]
+        touched.add(task_id)
+        if record.get("deleted"):
+            live.pop(task_id, None)
+            continue
+        problems.append(record)
+        live[task_id] = record["row"]
+
+    return DeltaState(manifest["version"], manifest["model_name"], dim, problems, embeddings, live, frozenset(touched))
+
+
+def validate(problem: dict) -> dict:
+    """Return ``problem`` with defaults filled in, or raise ValueError."""
+    for name in _TEXT_FIELDS:
+        value = problem.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Problem field '{name}' must be a non-empty string.")
+    cleaned = {**_DEFAULTS, **problem}
+    if not isinstance(cleaned["tags"], list) or not all(isinstance(tag, str) for tag in cleaned["tags"]):
+        raise ValueError("Problem field 'tags' must be a list of strings.")
+    return {name: cleaned[name] for name in (*_TEXT_FIELDS, *_DEFAULTS)}
+
+
+def apply(
+    directory: Path,
+    upserts: list[dict],
+    deletes: list[str],
+    encode: Callable[[list[str]], np.ndarray],
+    model_name: str,
+    dim: int,
+) -> int:
+    """Append upserts and deletes as one new version and return its number."""
+    problems = [validate(problem) for problem in upserts]
+
+    with _locked(directory):
+        manifest = _read_manifest(directory) or _empty_manifest(model_name, dim, generation=0, version=0)
+        if (manifest["model_name"], manifest["dim"]) != (model_name, dim):
+            raise ValueError(
+                f"Edits in {directory} were encoded with '{manifest['model_name']}' ({manifest['dim']} dims); "
+                "run 'python -m backend.question_index.updates compact' to re-encode them."
+            )
+        return _publish(directory, manifest, problems, deletes, encode)
+
+
+def compact(directory: Path, encode: Callable[[list[str]], np.ndarray], model_name: str, dim: int) -> int:
+    """
+    Rewrite the log with live problems and tombstones only, re-encoded with
+    ``model_name``, into a new generation of files published as one version.
+    """
+    with _locked(directory):
+        manifest = _read_manifest(directory)
+        state = load(directory)
+        if manifest is None or state is None:
+            return 0
+
+        live = [
+            {name: value for name, value in problem.items() if name != "row"}
+            for problem in state.problems
+            if state.live.get(problem["task_id"]) == problem["row"]
+        ]
+        deleted = sorted(state.touched - set(state.live))
+        fresh = _empty_manifest(model_name, dim, generation=manifest["generation"] + 1, version=manifest["version"])
+        version = _publish(directory, fresh, live, deleted, encode)
+
+        # Readers that still map the old generation keep their (unlinked) files until they reload.
+        for path in _paths(manifest, directory):
+            path.unlink(missing_ok=True)
+        return version
+
+
+def _publish(directory: Path, manifest: dict, problems: list[dict], deletes: list[str], encode) -> int:
+    dim = manifest["dim"]
+    embeddings = encode([problem["query"] for problem in problems]) if problems else np.empty((0, dim))
+    lines = [{**problem, "row": manifest["rows"] + offset} for offset, problem in enumerate(problems)]
+    lines.extend({"task_id": task_id, "deleted": True} for task_id in deletes)
+    payload = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+
+    # Truncating first drops anything a crashed writer appended after the last published version.
+    log_path, embeddings_path = _paths(manifest, directory)
+    _append(log_path, manifest["log_bytes"], payload)
+    row_bytes = dim * np.dtype(np.float32).itemsize
+    _append(embeddings_path, manifest["rows"] * row_bytes, np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+
+    manifest = {
+        **manifest,
+        "version": manifest["version"] + 1,
+        "records": manifest["records"] + len(lines),
+        "rows": manifest["rows"] + len(problems),
+        "log_bytes": manifest["log_bytes"] + len(payload),
+        "updated_at": time.time(),
+    }
+    _write_manifest(directory, manifest)
+    return manifest["version"]
+
+
+def _empty_manifest(model_name: str, dim: int, generation: int, version: int) -> dict:
+    return {
+        "version": version, "generation": generation, "model_name": model_name, "dim": dim,
+        "records": 0, "rows": 0, "log_bytes": 0,
+    }
+
+
+def _paths(manifest: dict, directory: Path) -> tuple[Path, Path]:
+    generation = manifest["generation"]
+    return directory / f"problems.{generation}.jsonl", directory / f"embeddings.{generation}.f32"
+
+
+def _append(path: Path, valid_bytes: int, payload: bytes) -> None:
+    with open(path, "ab") as handle:
+        handle.truncate(valid_bytes)
+        handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _read_manifest(directory: Path) -> dict | None:
+    try:
+        return json.loads((directory / _MANIFEST_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(directory: Path, manifest: dict) -> None:
+    payload = json.dumps(manifest, indent=2).encode("utf-8")
+    atomic_write(directory / _MANIFEST_FILE, lambda handle: handle.write(payload))
+
+
+@contextlib.contextmanager
+def _locked(directory: Path):
+    """Serialize writers across processes (not re-entrant)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / _LOCK_FILE, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _read_jsonl(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Edit the technical-question bank without a full rebuild.")
+    parser.add_argument("--split", default="train", help="Corpus split to edit (default: train).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    apply_parser = commands.add_parser("apply", help="Append and update problems by task_id, or delete them.")
+    apply_parser.add_argument("--upsert", type=Path, help="JSONL file of problems to add or replace.")
+    apply_parser.add_argument("--delete", nargs="*", default=[], help="task_ids to remove.")
+    commands.add_parser("compact", help="Drop superseded rows and re-encode with the current model.")
+    commands.add_parser("status", help="Show the current version.")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        state = load(delta_dir(args.split))
+        if state is None:
+            print("No edits yet.")
+        else:
+            print(f"Version {state.version}: {len(state.live)} live problems, "
+                  f"{len(state.touched) - len(state.live)} deleted ({state.model_name}).")
+        return
+
+    # Encoding needs the model, which is owned by the question index.
+    from backend.use_cases.technical_questions import QuestionIndex
+
+    index = QuestionIndex(split=args.split)
+    if args.command == "apply":
+        upserts = _read_jsonl(args.upsert) if args.upsert else []
+        version = index.apply_updates(upserts, args.delete)
+    else:
+        version = index.compact_updates()
+    print(f"Published version {version}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Drive the API against the fake Gemini backend and report latency percentiles.
+
+Sets GEMINI_BACKEND=fake before importing the app, so no API key or network is
+needed, and sends concurrent /api/behavioral-questions requests in-process via
+httpx's ASGI transport. The fake's latency and error rate are flags here and
+the ``GEMINI_FAKE_*`` variables otherwise; the report compares observed
+latency with the injected model latency to show the backend's own overhead
+(queueing, retries, serialization).
+
+Example:
+    python backend/test/load/fake_backend_load.py --requests 500 --concurrency 32 \
+        --latency lognormal:0.8:0.4 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure the repo root is on sys.path so ``backend`` imports resolve.
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    import httpx
+
+    from backend.main import GEMINI_CLIENT, app
+    from backend.gemini.fake import Latency
+
+    model_latency = Latency.parse(args.latency)
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(args.requests):
+        queue.put_nowait(index)
+
+    async def worker(http: httpx.AsyncClient) -> None:
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            payload = {
+                # Distinct text per request so neither the response cache nor
+                # single-flight coalescing hides the model latency.
+                "resume": f"Candidate {index}: Python, Go, distributed systems.",
+                "job_description": "Backend engineering intern.",
+            }
+            start = time.perf_counter()
+            response = await http.post("/api/behavioral-questions", json=payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as http:
+        await asyncio.gather(*(worker(http) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"status codes: {dict(sorted(statuses.items()))}")
+    for label, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{label}: {_percentile(latencies, q) * 1000:.1f} ms")
+    if model_latency.kind == "fixed":
+        print(f"overhead vs injected latency (p50): {(_percentile(latencies, 0.5) - model_latency.a) * 1000:.1f} ms")
+    else:
+        print(f"mean: {statistics.fmean(latencies) * 1000:.1f} ms (injected {args.latency})")
+    print(f"fake calls: {GEMINI_CLIENT.client.calls}")
+    print(f"rate limit: {GEMINI_CLIENT.limiter.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the API against the offline Gemini backend.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="fixed:0.05", help="fixed:s, uniform:lo:hi or lognormal:median:sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing with 429/503.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["GEMINI_BACKEND"] = "fake"
+    os.environ["GEMINI_FAKE_LATENCY"] = args.latency
+    os.environ["GEMINI_FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["GEMINI_FAKE_SEED"] = str(args.seed)
+    os.environ.setdefault("GEMINI_RESPONSE_CACHE", "0")
+    os.environ.setdefault("WARM_UP_QUESTION_INDEX", "0")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Show per-call prompt and cached tokens when ResumeEditor reuses a context cache.
+
+Runs offline against ``FakeGenaiClient`` by default; pass --live to call
+Gemini with GEMINI_API_KEY. Set GEMINI_RESPONSE_CACHE=0 so every call reaches
+the model.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("GEMINI_RESPONSE_CACHE", "0")
+
+# Ensure the repo root is on sys.path so ``backend`` imports resolve.
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from backend.gemini.fake import FakeGenaiClient  # noqa: E402
+from backend.gemini.gemini_client import GeminiClient  # noqa: E402
+from backend.use_cases.resume_editor import ResumeEditor  # noqa: E402
+
+_JOB = (
+    "Software Engineering Intern. Build and operate backend services in Python and Go, "
+    "write well-tested code, and collaborate across product and infrastructure teams. "
+) * 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Context-cache reuse across ResumeEditor calls.")
+    parser.add_argument("--resume", type=Path, default=Path(__file__).with_name("Isabella Zhong Resume - Amazon.pdf"))
+    parser.add_argument("--calls", type=int, default=3, help="Generations to run (default: 3).")
+    parser.add_argument("--live", action="store_true", help="Call the real Gemini API.")
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    args = parser.parse_args()
+
+    client = GeminiClient(args.model, client=None if args.live else FakeGenaiClient())
+    editor = ResumeEditor(client, _JOB)
+    resume = client.prepare_bytes(args.resume.read_bytes(), "application/pdf", display_name=args.resume.name)
+
+    for call in range(1, args.calls + 1):
+        start = time.perf_counter()
+        response = client.generate(resume, prefix=editor._prefix(), use_case="resume_editor")
+        usage = response.usage_metadata
+        print(
+            f"call {call}: {time.perf_counter() - start:.2f}s, "
+            f"prompt={usage.prompt_token_count} cached={usage.cached_content_token_count or 0}"
+        )
+    print(client.context_caches.stats() if client.context_caches else "context caching disabled")
+
+
+if __name__ == "__main__":
+    main()
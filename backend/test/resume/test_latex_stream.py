@@ -0,0 +1,56 @@
+"""LatexStreamExtractor must stream the LaTeX while the model is still writing.
+
+Run with ``python -m pytest backend/test/resume/test_latex_stream.py``.
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure the repo root is on sys.path so ``backend`` imports resolve.
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from backend.use_cases.resume_editor import LatexStreamExtractor  # noqa: E402
+
+_DOCUMENT = (
+    "\\documentclass[10pt]{article}\n"
+    "\\usepackage[margin=0.5in]{geometry}\n"
+    "\\begin{document}\n"
+    "\\section{Experience}\n"
+    "Built things.\n"
+    "\\end{document}"
+)
+
+
+def _stream(response: str, size: int = 10) -> list[str]:
+    extractor = LatexStreamExtractor()
+    pieces = [extractor.feed(response[start:start + size]) for start in range(0, len(response), size)]
+    return pieces + [extractor.finish()]
+
+
+def test_unfenced_document_streams_before_the_reply_ends():
+    pieces = _stream(_DOCUMENT + "\n")
+
+    assert "".join(pieces) == _DOCUMENT
+    # Most of the document is out before finish() is called.
+    assert len("".join(pieces[:-1])) >= len(_DOCUMENT) - len("\\end{document}")
+    assert pieces[1] != ""
+
+
+def test_fence_that_comes_first_wins():
+    response = "```python\nprint('hi')\n```\nHere you go:\n```latex\n" + _DOCUMENT + "\n```\n"
+
+    assert "".join(_stream(response)) == _DOCUMENT
+
+
+def test_fenced_block_that_is_not_latex_falls_back_to_the_document():
+    response = "```latex\n\\usepackage{enumitem}\n```\nThen: " + _DOCUMENT + " thanks"
+
+    assert "".join(_stream(response)).strip() == _DOCUMENT
+
+
+def test_documentclass_mentioned_in_prose_does_not_start_a_document():
+    response = "This uses \\documentclass{article} as asked:\n```latex\n" + _DOCUMENT + "\n```"
+
+    assert "".join(_stream(response)) == _DOCUMENT
@@ -0,0 +1,85 @@
+"""Measure recall@k and latency of the IVF search backend against exact search.
+
+Runs against the real LeetCode index by default. Pass --synthetic N to benchmark
+a random clustered corpus of N rows instead (no model or dataset download).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure the repo root is on sys.path so ``backend`` imports resolve.
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from backend.question_index.ann import ExactIndex, IVFIndex  # noqa: E402
+
+
+def _synthetic_corpus(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    data = centers[rng.integers(clusters, size=rows)] + 0.6 * rng.normal(size=(rows, dim))
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data.astype(np.float32)
+
+
+def _load_real_corpus() -> np.ndarray:
+    from backend.use_cases.technical_questions import warm_up
+
+    return warm_up().problem_embeddings
+
+
+def _sample_queries(embeddings: np.ndarray, count: int, seed: int) -> np.ndarray:
+    # Perturbed corpus rows stand in for job descriptions near the corpus.
+    rng = np.random.default_rng(seed + 1)
+    rows = np.asarray(embeddings[rng.choice(embeddings.shape[0], size=count, replace=False)])
+    noisy = rows + 0.3 * rng.normal(size=rows.shape) / np.sqrt(rows.shape[1])
+    return (noisy / np.linalg.norm(noisy, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _timed(search, queries: np.ndarray, k: int) -> tuple[list[list[int]], float]:
+    start = time.perf_counter()
+    results = [search(query, k) for query in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall@k of IVF search vs exact brute force.")
+    parser.add_argument("--synthetic", type=int, help="Benchmark a random corpus with this many rows.")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the synthetic corpus (default: 384).")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries (default: 200).")
+    parser.add_argument("-k", type=int, default=10, help="Results per query (default: 10).")
+    parser.add_argument("--n-lists", type=int, help="IVF lists (default: sqrt(rows)).")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="nprobe values to sweep.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        embeddings = _synthetic_corpus(args.synthetic, args.dim, clusters=max(8, args.synthetic // 500), seed=args.seed)
+    else:
+        embeddings = _load_real_corpus()
+    queries = _sample_queries(embeddings, min(args.queries, embeddings.shape[0]), args.seed)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(embeddings, n_lists=args.n_lists, seed=args.seed)
+    build_seconds = time.perf_counter() - start
+
+    exact_results, exact_ms = _timed(ExactIndex(embeddings).search, queries, args.k)
+
+    print(f"Corpus: {embeddings.shape[0]} rows x {embeddings.shape[1]} dims, {ivf.n_lists} lists (built in {build_seconds:.2f}s)")
+    print(f"exact      recall@{args.k}=1.000  {exact_ms:.3f} ms/query")
+    for nprobe in args.nprobe:
+        ivf_results, ivf_ms = _timed(lambda q, k: ivf.search(q, k, nprobe=nprobe), queries, args.k)
+        hits = sum(len(set(a) & set(b)) for a, b in zip(ivf_results, exact_results))
+        recall = hits / sum(len(b) for b in exact_results)
+        print(f"nprobe={nprobe:<4} recall@{args.k}={recall:.3f}  {ivf_ms:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
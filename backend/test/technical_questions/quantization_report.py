@@ -0,0 +1,65 @@
+"""Report memory saved and top-k overlap of quantized corpus embeddings.
+
+Compares float16 and int8 storage against float32 exact search, with and
+without the float32 rerank of the shortlist. Runs against the real LeetCode
+index by default; pass --synthetic N for a random corpus of N rows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure the repo root is on sys.path so ``backend`` imports resolve.
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from backend.question_index.ann import ExactIndex  # noqa: E402
+from backend.question_index.quantization import DenseStore, Float16Store, Int8Store  # noqa: E402
+from ann_recall_benchmark import _load_real_corpus, _sample_queries, _synthetic_corpus  # noqa: E402
+
+
+def _format_bytes(num_bytes: int) -> str:
+    return f"{num_bytes / (1024 ** 2):.2f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory and top-k overlap of quantized embeddings.")
+    parser.add_argument("--synthetic", type=int, help="Use a random corpus with this many rows.")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the synthetic corpus (default: 384).")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries (default: 200).")
+    parser.add_argument("-k", type=int, default=10, help="Results per query (default: 10).")
+    parser.add_argument("--rerank", type=int, default=4, help="Shortlist multiplier for the float32 rerank (default: 4).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        embeddings = _synthetic_corpus(args.synthetic, args.dim, clusters=max(8, args.synthetic // 500), seed=args.seed)
+    else:
+        embeddings = np.asarray(_load_real_corpus())
+    queries = _sample_queries(embeddings, min(args.queries, embeddings.shape[0]), args.seed)
+
+    reference = [ExactIndex(embeddings).search(query, args.k) for query in queries]
+    baseline = DenseStore(embeddings).nbytes
+    print(f"Corpus: {embeddings.shape[0]} rows x {embeddings.shape[1]} dims, float32 = {_format_bytes(baseline)}")
+
+    for store in (Float16Store.quantize(embeddings), Int8Store.quantize(embeddings)):
+        saved = 1 - store.nbytes / baseline
+        print(f"\n{store.dtype}: {_format_bytes(store.nbytes)} ({saved:.0%} smaller)")
+        for rerank in (0, args.rerank):
+            index = ExactIndex(embeddings, store=store, rerank=rerank)
+            start = time.perf_counter()
+            results = [index.search(query, args.k) for query in queries]
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+            overlap = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(results, reference)])
+            label = f"rerank x{rerank}" if rerank else "no rerank"
+            print(f"  {label:<10} top-{args.k} overlap={overlap:.3f}  {elapsed_ms:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Edited problems must get BM25 scores on the same scale as the base corpus.
+
+Run with ``python -m pytest backend/test/technical_questions/test_lexical_edits.py``.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Ensure the repo root is on sys.path so ``backend`` imports resolve.
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from backend.question_index.lexical import LexicalIndex  # noqa: E402
+
+_BASE = [
+    "Two Sum: return indices of two numbers in an array that add up to a target using a hash map",
+    "Binary Tree Inorder Traversal: visit the left subtree, the node, then the right subtree",
+    "Longest Substring Without Repeating Characters: sliding window over a string",
+    "Implement Trie: insert words and search by prefix in a prefix tree",
+    "Merge Intervals: sort intervals by start and merge the overlapping ones",
+    "Number of Islands: count connected components of land in a grid with BFS or DFS",
+]
+_QUERY = "trie prefix tree search"
+
+
+def test_edit_duplicating_a_base_row_scores_the_same():
+    base = LexicalIndex.build(_BASE)
+    edits = LexicalIndex.build([_BASE[3], _BASE[0]], reference=base)
+
+    base_scores = base.score(_QUERY)
+    edit_scores = edits.score(_QUERY)
+
+    assert base_scores[3] > 0
+    np.testing.assert_allclose(edit_scores[0], base_scores[3], rtol=1e-6)
+    np.testing.assert_allclose(edit_scores[1], base_scores[0], rtol=1e-6)
+
+
+def test_reference_statistics_survive_save_and_load(tmp_path):
+    base = LexicalIndex.build(_BASE)
+    base.save(tmp_path / "lexical.npz")
+    loaded = LexicalIndex.load(tmp_path / "lexical.npz", len(_BASE))
+
+    edits = LexicalIndex.build([_BASE[3]], reference=loaded)
+
+    np.testing.assert_allclose(edits.score(_QUERY)[0], base.score(_QUERY)[3], rtol=1e-6)
+
+
+if __name__ == "__main__":
+    import pytest
+
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -1,11 +1,18 @@
 """Generate resume-aware behavioral interview questions with Gemini."""
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import TypedDict
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Iterable, Iterator, TypedDict
 from backend.gemini.gemini_client import GeminiClient
 from google.genai import types
 
+# Pairs generated at once by the batch helpers; GeminiClient's rate limiter
+# still caps what actually reaches the API.
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("BEHAVIORAL_BATCH_CONCURRENCY", "8"))
+
 
 class BehavioralQuestionsResponse(TypedDict):
     """Structured response returned by ``generate_behavioral_questions``."""
@@ -65,6 +72,74 @@ def generate_behavioral_questions(
         ValueError: If inputs are empty or the Gemini response is malformed.
     """
 
+    contents, config = _build_request(resume, job_description)
+    response = client.generate(contents, config=config, use_case="behavioral_questions")
+    return _parse_response(response.text)
+
+
+async def generate_behavioral_questions_async(
+    client: GeminiClient, resume: str, job_description: str
+) -> BehavioralQuestionsResponse:
+    """Async variant of ``generate_behavioral_questions`` built on ``client.aio``."""
+
+    contents, config = _build_request(resume, job_description)
+    response = await client.aio.generate(contents, config=config, use_case="behavioral_questions")
+    return _parse_response(response.text)
+
+
+def generate_behavioral_questions_batch(
+    client: GeminiClient, pairs: Iterable[tuple[str, str]], concurrency: int = DEFAULT_BATCH_CONCURRENCY
+) -> Iterator[tuple[int, BehavioralQuestionsResponse | Exception]]:
+    """Generate questions for many ``(resume, job_description)`` pairs on a thread pool.
+
+    Yields ``(index, result)`` in completion order, where ``result`` is either
+    the questions or the exception that item raised; one failing pair does not
+    affect the others.
+    """
+
+    pairs = list(pairs)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(generate_behavioral_questions, client, resume, job_description): index
+            for index, (resume, job_description) in enumerate(pairs)
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], error if error is not None else future.result()
+
+
+async def generate_behavioral_questions_batch_async(
+    client: GeminiClient, pairs: Iterable[tuple[str, str]], concurrency: int = DEFAULT_BATCH_CONCURRENCY
+) -> AsyncIterator[tuple[int, BehavioralQuestionsResponse | Exception]]:
+    """Async variant of ``generate_behavioral_questions_batch`` using at most ``concurrency`` tasks."""
+
+    pairs = list(pairs)
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(len(pairs)):
+        queue.put_nowait(index)
+    results: asyncio.Queue[tuple[int, BehavioralQuestionsResponse | Exception]] = asyncio.Queue()
+
+    async def worker() -> None:
+        while not queue.empty():
+            index = queue.get_nowait()
+            resume, job_description = pairs[index]
+            try:
+                result = await generate_behavioral_questions_async(client, resume, job_description)
+            except Exception as exc:
+                result = exc
+            results.put_nowait((index, result))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max(1, concurrency), len(pairs)))]
+    try:
+        for _ in range(len(pairs)):
+            yield await results.get()
+    finally:
+        # The consumer may stop early (e.g. the HTTP client disconnected).
+        for task in workers:
+            task.cancel()
+
+
+def _build_request(resume: str, job_description: str) -> tuple[list[types.Content], types.GenerateContentConfig]:
     if not resume or not resume.strip():
         raise ValueError("resume cannot be empty")
     if not job_description or not job_description.strip():
@@ -72,17 +147,17 @@ def generate_behavioral_questions(
 
     prompt = _build_prompt(resume=resume, job_description=job_description)
 
-    response = client.client.models.generate_content(
-        model=client.model,
-        contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=_BEHAVIORAL_SCHEMA,
-        ),
+    contents = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=_BEHAVIORAL_SCHEMA,
     )
+    return contents, config
+
 
+def _parse_response(text: str | None) -> BehavioralQuestionsResponse:
     try:
-        payload = json.loads(response.text or "{}")
+        payload = json.loads(text or "{}")
     except json.JSONDecodeError as exc:
         raise ValueError("Gemini response was not valid JSON") from exc
 
@@ -10,9 +10,14 @@ class JobFormatter:
         """
         Summarizes job description to use up less tokens. 
         """
-        prompt = (
+        return self.client.getResponse(self._build_prompt(), use_case="job_formatter")
+
+    async def summarize_job_description_async(self):
+        return await self.client.aio.getResponse(self._build_prompt(), use_case="job_formatter")
+
+    def _build_prompt(self) -> str:
+        return (
             f"Please summarize this job description to highlight the\n"
             f"key qualifications that the job wants. Here is the job:\n"
             f"${self.job_description}"
         )
-        return self.client.getResponse(prompt)
\ No newline at end of file
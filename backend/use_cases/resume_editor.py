@@ -2,6 +2,7 @@ from backend.gemini.gemini_client import GeminiClient
 
 import re
 from pathlib import Path
+from typing import AsyncIterator, Iterator
 
 from dotenv import load_dotenv
 from google.genai import types 
@@ -10,6 +11,135 @@ _ENV_PATH = Path(__file__).resolve().parent / ".env"
 load_dotenv(dotenv_path=_ENV_PATH, override=False)
 
 
+_FENCE = "```"
+# A bare document has \documentclass at the start of a line, not inside prose.
+_DOCUMENT_START = re.compile(r"^[ \t]*(\\documentclass)", flags=re.MULTILINE)
+_END_DOCUMENT = "\\end{document}"
+_FENCE_LANGUAGE = re.compile(r"[\w+-]*")
+_LATEX_DOCUMENT = re.compile(r"(\\documentclass[\s\S]+?\\end\{document\})", flags=re.IGNORECASE)
+
+
+def _looks_like_latex(content: str) -> bool:
+    """Heuristic check to verify the snippet resembles LaTeX."""
+    return bool(
+        re.search(r"\\documentclass", content)
+        or re.search(r"\\begin\{document\}", content)
+        or re.search(r"\\section\{", content)
+        or re.search(r"\\```latex", content)
+    )
+
+
+class LatexStreamExtractor:
+    """Pull the LaTeX body out of a model response as it arrives.
+
+    ``feed`` takes the next piece of the response and returns whatever LaTeX can
+    already be emitted; ``finish`` flushes the rest. A bare \\documentclass ...
+    \\end{document} span whose first line comes before any fence (the reply the
+    prompt asks for) is streamed as it arrives. Otherwise the body is the first fenced block
+    that ``_looks_like_latex``: each block is buffered until it either passes
+    that check, and is streamed from then on, or closes and is skipped. Text
+    that could still turn out to be a closing marker is held back until the
+    next piece settles it. Without such a block, ``finish`` returns the first
+    \\documentclass ... \\end{document} span, or else the whole response.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._mode = "search"  # search | raw | candidate | latex | done
+        self._response: list[str] = []
+        self._emitted = False
+
+    def feed(self, chunk: str) -> str:
+        self._response.append(chunk)
+        self._buffer += chunk
+        pieces = []
+        while True:
+            piece, progressed = self._step()
+            pieces.append(piece)
+            if not progressed:
+                return self._emit("".join(pieces))
+
+    def finish(self) -> str:
+        if self._mode == "latex":
+            tail = self._emit(self._buffer.rstrip())
+        elif self._mode == "raw":
+            tail = self._emit(self._buffer)
+        else:
+            tail = ""
+        self._buffer, self._mode = "", "done"
+        if self._emitted:
+            return tail
+
+        response = "".join(self._response)
+        if not response.strip():
+            raise ValueError("Response is empty.")
+        fallback = _LATEX_DOCUMENT.search(response)
+        if fallback:
+            return fallback.group(1).strip()
+        # fall back
+        return response
+
+    def _emit(self, text: str) -> str:
+        if not self._emitted:
+            text = text.lstrip()
+            self._emitted = bool(text)
+        return text
+
+    def _step(self) -> tuple[str, bool]:
+        buffer = self._buffer
+        if self._mode == "search":
+            fence = buffer.find(_FENCE)
+            document = _DOCUMENT_START.search(buffer)
+            if document is not None and (fence == -1 or document.start(1) < fence):
+                self._buffer, self._mode = buffer[document.start(1):], "raw"
+                return "", True
+            if fence == -1:
+                # Keep the current line: a marker may be split across pieces.
+                self._buffer = buffer[buffer.rfind("\n") + 1:]
+                return "", False
+            newline = buffer.find("\n", fence)
+            if newline == -1:
+                self._buffer = buffer[fence:]  # language tag not complete yet
+                return "", False
+            opening = fence + len(_FENCE)
+            # A language tag ends the fence line; anything else is already content.
+            if _FENCE_LANGUAGE.fullmatch(buffer[opening:newline].strip()):
+                opening = newline + 1
+            self._buffer, self._mode = buffer[opening:], "candidate"
+            return "", True
+
+        if self._mode == "raw":
+            end = buffer.find(_END_DOCUMENT)
+            if end != -1:
+                self._buffer, self._mode = "", "done"
+                return buffer[:end + len(_END_DOCUMENT)], False
+            split = max(0, len(buffer) - (len(_END_DOCUMENT) - 1))
+            self._buffer = buffer[split:]
+            return buffer[:split], False
+
+        if self._mode == "candidate":
+            close = buffer.find(_FENCE)
+            if _looks_like_latex(buffer if close == -1 else buffer[:close]):
+                self._mode = "latex"
+                return "", True
+            if close == -1:
+                return "", False  # keep the block until it is confirmed or closed
+            self._buffer, self._mode = buffer[close + len(_FENCE):], "search"
+            return "", True
+
+        if self._mode == "latex":
+            close = buffer.find(_FENCE)
+            if close != -1:
+                self._buffer, self._mode = "", "done"
+                return buffer[:close].rstrip(), False
+            settled = buffer.rstrip("` \t\r\n")
+            self._buffer = buffer[len(settled):]
+            return settled, False
+
+        self._buffer = ""
+        return "", False
+
+
 class ResumeEditor:
     def __init__(self, client:GeminiClient, job_description: str):
         self.client = client
@@ -20,29 +150,49 @@ class ResumeEditor:
         if not response or not response.strip():
             raise ValueError("Response is empty.")
 
-        code_blocks = re.findall(r"```(?:latex)?\s*(.*?)```", response, flags=re.DOTALL | re.IGNORECASE)
-        for block in code_blocks:
-            if self._looks_like_latex(block):
-                return block.strip()
+        extractor = LatexStreamExtractor()
+        return (extractor.feed(response) + extractor.finish()).strip()
 
-        fallback = re.search(r"(\\documentclass[\s\S]+?\\end\{document\})", response, flags=re.IGNORECASE)
-        if fallback:
-            return fallback.group(1).strip()
+    def generate_latex_resume(self, file: types.File | types.Part):
+        response = self.client.generate(file, prefix=self._prefix(), use_case="resume_editor").text
 
-        # fall back
-        return response
-    
-    def _looks_like_latex(self, content: str) -> bool:
-        """Heuristic check to verify the snippet resembles LaTeX."""
-        return bool(
-            re.search(r"\\documentclass", content)
-            or re.search(r"\\begin\{document\}", content)
-            or re.search(r"\\section\{", content)
-            or re.search(r"\\```latex", content)
-        )
-    
-    def generate_latex_resume(self, file: types.File):
-        prompt = (
+        return self.find_latex_code(response)
+
+    async def generate_latex_resume_async(self, file: types.File | types.Part):
+        """Same as ``generate_latex_resume`` without blocking the event loop."""
+        response = (await self.client.aio.generate(file, prefix=self._prefix(), use_case="resume_editor")).text
+
+        return self.find_latex_code(response)
+
+    def stream_latex_resume(self, file: types.File | types.Part) -> Iterator[str]:
+        """Yield the LaTeX document piece by piece as the model writes it."""
+        extractor = LatexStreamExtractor()
+        for chunk in self.client.generate_stream(file, prefix=self._prefix(), use_case="resume_editor"):
+            piece = extractor.feed(chunk.text or "")
+            if piece:
+                yield piece
+        tail = extractor.finish()
+        if tail:
+            yield tail
+
+    async def stream_latex_resume_async(self, file: types.File | types.Part) -> AsyncIterator[str]:
+        """Async variant of ``stream_latex_resume``."""
+        extractor = LatexStreamExtractor()
+        async for chunk in self.client.aio.generate_stream(file, prefix=self._prefix(), use_case="resume_editor"):
+            piece = extractor.feed(chunk.text or "")
+            if piece:
+                yield piece
+        tail = extractor.finish()
+        if tail:
+            yield tail
+
+    def _prefix(self) -> list[str]:
+        # Instructions + job description are identical for every resume of a
+        # project, so GeminiClient serves them from a context cache.
+        return [self._build_prompt()]
+
+    def _build_prompt(self) -> str:
+        return (
         "You are an expert Resume Writer and LaTeX Typesetter. Your goal is to rewrite the attached resume "
         "into a clean, professional, single-page LaTeX document tailored specifically to the Job Description provided.\n\n"
         
@@ -71,7 +221,3 @@ class ResumeEditor:
         f"### JOB DESCRIPTION:\n{self.job_description}"
         )
 
-        response = self.client.getFileResponse(prompt, file)
-
-        return self.find_latex_code(response)
-
@@ -1,30 +1,487 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-
-class TechnicalQuestionsGenerator: 
-    def __init__(self, job_description: str):
-        self.job_description = job_description  
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        splits = {'train': 'LeetCodeDataset-train.jsonl', 'test': 'LeetCodeDataset-test.jsonl'}
-        self.df = pd.read_json("hf://datasets/newfacade/LeetCodeDataset/" + splits["train"], lines=True)
-
-        self.problem_embeddings = self.model.encode(self.df['query'].tolist(), convert_to_tensor=True)
-        self.job_desc_embedding = self.model.encode(job_description, convert_to_tensor=True)
-
-    def find_top_questions(self, k:int):
-        hits = util.semantic_search(self.job_desc_embedding, self.problem_embeddings, top_k=k)
-        problems = []
-
-        for hit in hits[0]:
-            idx = hit['corpus_id']
-            problems.append(self.format_problem(self.df.iloc[idx]))
-        
-        return problems
-    
+from sentence_transformers import SentenceTransformer
+
+from backend.question_index import ann, embedding_store, lexical, quantization, snapshot, updates
+from backend.question_index.filters import FilterIndex, QuestionFilter
+from backend.question_index.query_cache import EmbeddingLRUCache, cache_key
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DATASET_URL = "hf://datasets/newfacade/LeetCodeDataset/"
+_SPLITS = {'train': 'LeetCodeDataset-train.jsonl', 'test': 'LeetCodeDataset-test.jsonl'}
+_QUERY_BATCH_SIZE = 128
+# Hybrid search fuses scores over this many times k candidates from each retriever.
+_HYBRID_DEPTH = 4
+
+
+@dataclass(frozen=True)
+class Corpus:
+    """
+    One published version of the problem bank: the base dataset plus edits.
+
+    Row ids ``0..n_base-1`` are base rows; ``n_base + r`` is row ``r`` of the
+    edit log. Ids never change within a log generation, and rows that were
+    deleted or superseded are listed in ``hidden`` instead of being removed.
+    """
+
+    df: pd.DataFrame
+    filter_index: FilterIndex
+    n_base: int
+    stamp: tuple[int, int] | None = None
+    edits: updates.DeltaState | None = None
+    edit_lexical: lexical.LexicalIndex | None = None
+    # Sorted ids that must never be returned.
+    hidden: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    hidden_base: int = 0
+    # Sorted edit-log rows that are the live version of their task_id.
+    live_edits: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+
+class QuestionIndex:
+    """
+    Embedding model plus the encoded LeetCode corpus.
+
+    Building it is expensive (model load, dataset download, corpus encoding), so a
+    process builds it once and every request reuses it. Edits published through
+    ``apply_updates`` (by this or any other process) are picked up on the next
+    search without rebuilding the base index.
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        split: str = "train",
+        backend: str = ann.DEFAULT_BACKEND,
+        nprobe: int = ann.DEFAULT_NPROBE,
+        dtype: str = quantization.DEFAULT_DTYPE,
+        rerank: int = ann.DEFAULT_RERANK,
+        lexical_weight: float = lexical.DEFAULT_WEIGHT,
+    ):
+        self.model_name = model_name
+        self.split = split
+        self.backend = backend
+        self.nprobe = nprobe
+        self.dtype = dtype
+        self.rerank = rerank
+        self.lexical_weight = lexical_weight
+        self.delta_dir = updates.delta_dir(split)
+        self.model: SentenceTransformer | None = None
+        self.snapshot: snapshot.Snapshot | None = None
+        self.problem_embeddings = None
+        self.searcher = None
+        self.exact_searcher: ann.ExactIndex | None = None
+        self.lexical_index: lexical.LexicalIndex | None = None
+        self.query_cache = EmbeddingLRUCache()
+        self.error: Exception | None = None
+        self._base_df: pd.DataFrame | None = None
+        self._base_filter: FilterIndex | None = None
+        self._corpus: Corpus | None = None
+        self._building = False
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def state(self) -> str:
+        if self.ready:
+            return "ready"
+        if self._building:
+            return "building"
+        if self.error is not None:
+            return "failed"
+        return "idle"
+
+    @property
+    def df(self) -> pd.DataFrame | None:
+        return self._corpus.df if self._corpus is not None else None
+
+    @property
+    def filter_index(self) -> FilterIndex | None:
+        return self._corpus.filter_index if self._corpus is not None else None
+
+    def build(self) -> "QuestionIndex":
+        """Build the index if needed. Concurrent callers wait for the first build."""
+        if self.ready:
+            return self
+
+        with self._lock:
+            if self.ready:
+                return self
+
+            self._building = True
+            try:
+                model = SentenceTransformer(self.model_name)
+                dataset = snapshot.open_snapshot(self.split)
+                if dataset is not None:
+                    df = dataset.load()
+                else:
+                    df = pd.read_json(DATASET_URL + _SPLITS[self.split], lines=True)
+                embeddings, cache_dir = self._load_embeddings(model, df)
+                store = quantization.load_or_build(self.dtype, embeddings, cache_dir)
+                searcher = ann.load_or_build(
+                    self.backend, embeddings, cache_dir, nprobe=self.nprobe, store=store, rerank=self.rerank
+                )
+                filter_index = FilterIndex.build(df)
+                lexical_index = lexical.load_or_build(
+                    lambda: _lexical_documents(df, dataset), len(df), cache_dir
+                )
+
+                self.model = model
+                self.snapshot = dataset
+                self.problem_embeddings = embeddings
+                self.searcher = searcher
+                self.exact_searcher = ann.ExactIndex(embeddings)
+                self.lexical_index = lexical_index
+                self._base_df = df
+                self._base_filter = filter_index
+                self._corpus = self._load_corpus()
+            except Exception as exc:
+                self.error = exc
+                raise
+            finally:
+                self._building = False
+
+            self.error = None
+            self._ready.set()
+        return self
+
+    def _load_embeddings(self, model: SentenceTransformer, df: pd.DataFrame) -> tuple[np.ndarray, Path]:
+        """Memory-map cached corpus embeddings, encoding the corpus only on a cache miss."""
+        texts = df['query'].tolist()
+        key = embedding_store.CacheKey(
+            model_name=self.model_name,
+            dataset_hash=embedding_store.dataset_hash(texts),
+            dim=model.get_sentence_embedding_dimension(),
+        )
+        embeddings = embedding_store.load_or_build(key, texts, lambda batch: _encode(model, batch))
+        return embeddings, embedding_store.entry_dir(key)
+
+    def corpus(self) -> Corpus:
+        """The current corpus version, reloading edits if a newer version was published."""
+        self.build()
+        if updates.stamp(self.delta_dir) != self._corpus.stamp:
+            with self._reload_lock:
+                if updates.stamp(self.delta_dir) != self._corpus.stamp:
+                    # A single attribute swap; searches keep using the version they started with.
+                    self._corpus = self._load_corpus()
+        return self._corpus
+
+    def _load_corpus(self) -> Corpus:
+        n_base = len(self._base_df)
+        stamp = updates.stamp(self.delta_dir)
+        edits = updates.load(self.delta_dir)
+        if edits is None or not edits.touched:
+            return Corpus(df=self._base_df, filter_index=self._base_filter, n_base=n_base, stamp=stamp)
+
+        dim = self.problem_embeddings.shape[1]
+        if (edits.model_name, edits.dim) != (self.model_name, dim):
+            # Written with another model: re-encode in memory until the log is compacted.
+            encoded = _encode(self.model, [problem["query"] for problem in edits.problems]).reshape(-1, dim)
+            edits = replace(edits, embeddings=encoded, model_name=self.model_name, dim=dim)
+
+        edit_df = pd.DataFrame(edits.problems).reindex(columns=self._base_df.columns)
+        df = pd.concat([self._base_df, edit_df], ignore_index=True)
+
+        live_edits = np.array(sorted(edits.live.values()), dtype=np.int64)
+        hidden_base = np.flatnonzero(self._base_df['task_id'].isin(edits.touched))
+        dead_edits = np.setdiff1d(np.arange(len(edits.problems)), live_edits) + n_base
+        # Scored with the base corpus statistics so edit and base scores can be fused.
+        edit_lexical = lexical.LexicalIndex.build(
+            [f"{problem['query']} {problem['problem_description']}" for problem in edits.problems],
+            reference=self.lexical_index,
+        )
+        return Corpus(
+            df=df,
+            filter_index=FilterIndex.build(df),
+            n_base=n_base,
+            stamp=stamp,
+            edits=edits,
+            edit_lexical=edit_lexical,
+            hidden=np.concatenate([hidden_base, dead_edits]).astype(np.int64),
+            hidden_base=int(hidden_base.size),
+            live_edits=live_edits,
+        )
+
+    def apply_updates(self, upserts: list[dict], deletes: list[str]) -> int:
+        """
+        Add or replace problems by ``task_id`` and delete others, encoding only the
+        upserted rows. Returns the new version, which every worker picks up on its
+        next search.
+        """
+        corpus = self.corpus()
+        unknown = sorted(set(deletes) - self._live_task_ids(corpus))
+        if unknown:
+            raise KeyError(f"Unknown task_id(s): {', '.join(unknown)}")
+
+        version = updates.apply(
+            self.delta_dir,
+            upserts,
+            deletes,
+            lambda texts: _encode(self.model, texts),
+            self.model_name,
+            self.problem_embeddings.shape[1],
+        )
+        self.corpus()
+        return version
+
+    def compact_updates(self) -> int:
+        """Rewrite the edit log with live rows only (re-encoded with the current model)."""
+        self.build()
+        version = updates.compact(
+            self.delta_dir, lambda texts: _encode(self.model, texts), self.model_name, self.problem_embeddings.shape[1]
+        )
+        self.corpus()
+        return version
+
+    def _live_task_ids(self, corpus: Corpus) -> set[str]:
+        if corpus.edits is None:
+            return set(corpus.df['task_id'])
+        base = set(self._base_df['task_id']) - corpus.edits.touched
+        return base | set(corpus.edits.live)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        key = cache_key(self.model_name, text)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = _encode(self.build().model, text)
+            self.query_cache.put(key, embedding)
+        return embedding
+
+    def encode_queries(self, texts: list[str]) -> np.ndarray:
+        """Encode many job descriptions, running the cache misses in one batched forward pass."""
+        keys = [cache_key(self.model_name, text) for text in texts]
+        cached = [self.query_cache.get(key) for key in keys]
+        missing = [position for position, embedding in enumerate(cached) if embedding is None]
+
+        if missing:
+            batch = [texts[position] for position in missing]
+            encoded = _encode(self.build().model, batch, batch_size=min(len(batch), _QUERY_BATCH_SIZE))
+            for position, embedding in zip(missing, encoded):
+                self.query_cache.put(keys[position], embedding)
+                cached[position] = embedding
+
+        return np.stack(cached) if cached else np.empty((0, 0), dtype=np.float32)
+
+    def fetch_details(self, row_ids: list[int], corpus: Corpus | None = None) -> dict[int, dict]:
+        """Heavy per-problem fields, read from the snapshot only for ``row_ids``."""
+        corpus = corpus or self.corpus()
+        details = {
+            row_id: {name: corpus.edits.problems[row_id - corpus.n_base][name] for name in snapshot.LAZY_COLUMNS}
+            for row_id in row_ids
+            if row_id >= corpus.n_base
+        }
+        base_ids = [row_id for row_id in row_ids if row_id < corpus.n_base]
+        if self.snapshot is not None:
+            details.update(self.snapshot.fetch(base_ids))
+        else:
+            details.update({row_id: self._base_df.iloc[row_id][snapshot.LAZY_COLUMNS].to_dict() for row_id in base_ids})
+        return details
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int,
+        exact: bool = False,
+        question_filter: QuestionFilter | None = None,
+        query_text: str | None = None,
+        corpus: Corpus | None = None,
+    ) -> list[int]:
+        """
+        Return corpus row ids of the ``k`` problems closest to the query.
+
+        ``exact=True`` bypasses the approximate backend, e.g. to validate its recall.
+        With ``question_filter`` only the matching rows are scored. With
+        ``query_text`` the embedding scores are fused with BM25 scores.
+        """
+        corpus = corpus or self.corpus()
+        searcher = self.exact_searcher if exact else self.searcher
+        hybrid = query_text is not None and self.lexical_weight > 0
+        depth = k * _HYBRID_DEPTH if hybrid else k
+
+        rows = None
+        if question_filter is not None and not question_filter.is_empty:
+            rows = np.setdiff1d(corpus.filter_index.match(question_filter), corpus.hidden, assume_unique=True)
+            ids = searcher.search_rows(query_embedding, depth, rows[rows < corpus.n_base])
+        else:
+            # Over-fetch so hidden base rows can be dropped without coming up short.
+            ids = searcher.search(query_embedding, depth + corpus.hidden_base)
+        ids = self._merge_edits(corpus, query_embedding, ids, depth, rows)
+
+        if hybrid:
+            return self._fuse(corpus, query_embedding, query_text, ids, k, rows)
+        return ids
+
+    def _merge_edits(self, corpus: Corpus, query_embedding: np.ndarray, base_ids: list[int], depth: int, rows: np.ndarray | None) -> list[int]:
+        """Drop hidden base rows and merge in the best live edited rows."""
+        if corpus.edits is None:
+            return base_ids[:depth]
+
+        base_ids = np.asarray(base_ids, dtype=np.int64)
+        base_ids = base_ids[~np.isin(base_ids, corpus.hidden)]
+        edit_ids = corpus.live_edits + corpus.n_base if rows is None else rows[rows >= corpus.n_base]
+        ids = np.concatenate([base_ids, edit_ids])
+        scores = self._vectors(corpus, ids) @ query_embedding
+        return ids[ann.top_k(scores, depth)].tolist()
+
+    def _vectors(self, corpus: Corpus, ids: np.ndarray) -> np.ndarray:
+        """Float32 embeddings for ``ids``, which may mix base and edited rows."""
+        vectors = np.empty((ids.size, self.problem_embeddings.shape[1]), dtype=np.float32)
+        is_base = ids < corpus.n_base
+        vectors[is_base] = self.problem_embeddings[ids[is_base]]
+        if not is_base.all():
+            vectors[~is_base] = corpus.edits.embeddings[ids[~is_base] - corpus.n_base]
+        return vectors
+
+    def _fuse(self, corpus: Corpus, query_embedding: np.ndarray, query_text: str, semantic_ids: list[int], k: int, rows: np.ndarray | None) -> list[int]:
+        """Rank the union of semantic and lexical candidates by their fused score."""
+        lexical_scores = self.lexical_index.score(query_text)
+        if corpus.edits is not None:
+            lexical_scores = np.concatenate([lexical_scores, corpus.edit_lexical.score(query_text)])
+            lexical_scores[corpus.hidden] = 0
+        pool = rows if rows is not None else np.arange(lexical_scores.shape[0])
+        pool_scores = lexical_scores[pool]
+        lexical_ids = pool[ann.top_k(pool_scores, min(k * _HYBRID_DEPTH, int(np.count_nonzero(pool_scores))))]
+
+        candidates = np.unique(np.concatenate([np.asarray(semantic_ids, dtype=np.int64), lexical_ids]))
+        if candidates.size == 0:
+            return []
+        semantic_scores = self._vectors(corpus, candidates) @ query_embedding
+        fused = lexical.fuse(semantic_scores, lexical_scores[candidates], self.lexical_weight)
+        return candidates[ann.top_k(fused, k)].tolist()
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        ks: list[int],
+        exact: bool = False,
+        question_filters: list[QuestionFilter | None] | None = None,
+        query_texts: list[str] | None = None,
+        corpus: Corpus | None = None,
+    ) -> list[list[int]]:
+        """
+        Batched ``search``: row ``i`` of the result holds the ``ks[i]`` ids for query ``i``.
+
+        Unfiltered queries share one batched search; filtered ones are scored
+        against their own subset.
+        """
+        corpus = corpus or self.corpus()
+        searcher = self.exact_searcher if exact else self.searcher
+        question_filters = question_filters or [None] * len(ks)
+        hybrid = query_texts is not None and self.lexical_weight > 0
+        results: list[list[int]] = [[] for _ in ks]
+
+        unfiltered = [i for i, item in enumerate(question_filters) if item is None or item.is_empty]
+        if unfiltered:
+            depths = [ks[i] * _HYBRID_DEPTH if hybrid else ks[i] for i in unfiltered]
+            hits = searcher.search_batch(query_embeddings[unfiltered], [depth + corpus.hidden_base for depth in depths])
+            for position, depth, ids in zip(unfiltered, depths, hits):
+                ids = self._merge_edits(corpus, query_embeddings[position], ids, depth, None)
+                if hybrid:
+                    ids = self._fuse(corpus, query_embeddings[position], query_texts[position], ids, ks[position], None)
+                results[position] = ids
+
+        for position, question_filter in enumerate(question_filters):
+            if question_filter is not None and not question_filter.is_empty:
+                results[position] = self.search(
+                    query_embeddings[position],
+                    ks[position],
+                    exact,
+                    question_filter,
+                    query_texts[position] if query_texts is not None else None,
+                    corpus,
+                )
+        return results
+
+
+def _lexical_documents(df: pd.DataFrame, dataset: snapshot.Snapshot | None) -> list[str]:
+    descriptions = df["problem_description"] if "problem_description" in df else dataset.load(["problem_description"])["problem_description"]
+    return [f"{query} {description}" for query, description in zip(df["query"], descriptions)]
+
+
+def _encode(model: SentenceTransformer, texts: list[str] | str, **kwargs) -> np.ndarray:
+    # Normalized embeddings turn cosine similarity into a plain dot product.
+    return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs).astype(np.float32)
+
+
+_SHARED_INDEX = QuestionIndex()
+
+
+def get_question_index() -> QuestionIndex:
+    """Return the process-wide index (not necessarily built yet)."""
+    return _SHARED_INDEX
+
+
+def warm_up() -> QuestionIndex:
+    """Build the shared index ahead of the first request."""
+    return _SHARED_INDEX.build()
+
+
+class TechnicalQuestionsGenerator:
+    def __init__(self, job_description: str | None = None, index: QuestionIndex | None = None):
+        """``job_description`` may be omitted when only ``find_top_questions_batch`` is used."""
+        self.job_description = job_description
+        self.index = (index or get_question_index()).build()
+        self.model = self.index.model
+        self.df = self.index.df
+
+        self.problem_embeddings = self.index.problem_embeddings
+        self.job_desc_embedding = self.index.encode_query(job_description) if job_description is not None else None
+
+    def find_top_questions(self, k:int, question_filter: QuestionFilter | None = None):
+        if self.job_desc_embedding is None:
+            raise ValueError("No job description was given to this generator.")
+
+        corpus = self.index.corpus()
+        ids = self.index.search(
+            self.job_desc_embedding, k, question_filter=question_filter, query_text=self.job_description, corpus=corpus
+        )
+        return self._load_problems(ids, corpus)
+
+    def find_top_questions_batch(
+        self,
+        job_descriptions: list[str],
+        top_ks: list[int],
+        question_filters: list[QuestionFilter | None] | None = None,
+    ) -> dict[int, list[dict]]:
+        """
+        Match many job descriptions at once, keyed by their position in the input.
+
+        All descriptions are encoded together and scored against the corpus in a
+        single matrix product instead of one model call and search per posting.
+        """
+        if len(job_descriptions) != len(top_ks):
+            raise ValueError("job_descriptions and top_ks must have the same length.")
+        if question_filters is not None and len(question_filters) != len(top_ks):
+            raise ValueError("question_filters must have one entry per job description.")
+        if not job_descriptions:
+            return {}
+
+        corpus = self.index.corpus()
+        embeddings = self.index.encode_queries(job_descriptions)
+        hits = self.index.search_batch(
+            embeddings, top_ks, question_filters=question_filters, query_texts=job_descriptions, corpus=corpus
+        )
+        return {position: self._load_problems(ids, corpus) for position, ids in enumerate(hits)}
+
+    def _load_problems(self, row_ids: list[int], corpus: Corpus) -> list[dict]:
+        # Rows and details come from the same corpus version as the search.
+        details = self.index.fetch_details(row_ids, corpus)
+        return [self.format_problem({**corpus.df.iloc[idx].to_dict(), **details[idx]}) for idx in row_ids]
+
     def format_title(self, task_id: str) -> str:
         words = task_id.replace('-', ' ').split()
         return ' '.join(word.capitalize() for word in words)
-    
+
     def format_problem(self, problem:dict):
         return {
             "title": self.format_title(problem['task_id']),
@@ -38,7 +495,7 @@ class TechnicalQuestionsGenerator:
 
 
 if __name__ == '__main__':
-    #example 
+    #example
     job = """
     What you’ll do:
     • Demonstrate accountability and quality in your work while receiving support and guidance from your mentor, manager, and peers
@@ -58,4 +515,4 @@ if __name__ == '__main__':
     • A curious nature with a desire to tackle and solve complex problem
     """
     t = TechnicalQuestionsGenerator(job)
-    print(t.find_top_questions(3))
\ No newline at end of file
+    print(t.find_top_questions(3))
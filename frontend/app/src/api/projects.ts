@@ -37,11 +37,17 @@ export async function uploadProject(title: string, jobFile: File): Promise<Creat
     return response.json();
 }
 
-export async function uploadOriginalResume(resumeFile: File): Promise<UploadResumeResponse> {
+// Without an id the backend uses the most recently created project, which is
+// only safe while a single user is creating projects.
+function projectPath(projectId?: number): string {
+    return `${API_BASE_URL}/api/projects/${projectId ?? "latest"}`;
+}
+
+export async function uploadOriginalResume(resumeFile: File, projectId?: number): Promise<UploadResumeResponse> {
     const formData = new FormData();
     formData.append("resume", resumeFile);
 
-    const response = await fetch(`${API_BASE_URL}/api/projects/latest/resume`, {
+    const response = await fetch(`${projectPath(projectId)}/resume`, {
         method: "POST",
         body: formData,
     });
@@ -54,8 +60,8 @@ export async function uploadOriginalResume(resumeFile: File): Promise<UploadResu
     return response.json();
 }
 
-export async function updateLatestJobDescription(jobDescription: string): Promise<JobDescriptionUpdateResponse> {
-    const response = await fetch(`${API_BASE_URL}/api/projects/latest/job-desc`, {
+export async function updateLatestJobDescription(jobDescription: string, projectId?: number): Promise<JobDescriptionUpdateResponse> {
+    const response = await fetch(`${projectPath(projectId)}/job-desc`, {
         method: "PUT",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ job_description: jobDescription }),
@@ -105,6 +111,60 @@ export async function convertResumeToLatex(resumeFile: File, jobDescription?: st
     return response.json();
 }
 
+export async function streamResumeToLatex(
+    resumeFile: File,
+    onChunk: (text: string) => void,
+    jobDescription?: string,
+    signal?: AbortSignal,
+): Promise<LatexConversionResponse> {
+    const formData = new FormData();
+    formData.append("resume", resumeFile);
+    if (jobDescription && jobDescription.trim()) {
+        formData.append("job_description", jobDescription.trim());
+    }
+
+    // EventSource cannot POST a file, so read the text/event-stream body directly.
+    const response = await fetch(`${API_BASE_URL}/api/resume/latex/stream`, {
+        method: "POST",
+        body: formData,
+        signal,
+    });
+
+    if (!response.ok || !response.body) {
+        const errorText = await response.text();
+        throw new Error(errorText || "Failed to convert resume to LaTeX");
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += value;
+
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf("\n\n");
+
+            const event = message.match(/^event: (.*)$/m)?.[1];
+            const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] ?? "{}");
+            if (event === "chunk") {
+                onChunk(data.text);
+            } else if (event === "done") {
+                return { latex: data.latex };
+            } else if (event === "error") {
+                throw new Error(data.detail || "Failed to convert resume to LaTeX");
+            }
+        }
+    }
+
+    throw new Error("LaTeX stream ended unexpectedly");
+}
+
 export async function fetchTechnicalQuestions(
     jobDescription: string,
     topK = 3,
@@ -14,7 +14,7 @@ import {
   XCircle
 } from 'lucide-react';
 import TechnicalPractice from '../../components/project_page/TechnicalPractice';
-import { convertResumeToLatex, uploadOriginalResume } from '../../api/projects';
+import { streamResumeToLatex, uploadOriginalResume } from '../../api/projects';
 
 type ViewType = 'resume' | 'technical' | 'behavior';
 
@@ -144,10 +144,15 @@ function ResumeUpload({ resumeData, jobDescription, onResumeUpdate, onJobDescrip
     }
 
     setConverting(true);
+    setLatexCode('');
+    setActiveTab('code');
     try {
-      const { latex } = await convertResumeToLatex(selectedFile, jobDescription);
+      const { latex } = await streamResumeToLatex(
+        selectedFile,
+        (text) => setLatexCode((current) => current + text),
+        jobDescription,
+      );
       setLatexCode(latex);
-      setActiveTab('code');
       showToast('Converted to LaTeX');
     } catch (error) {
       showToast((error as Error).message ?? 'Failed to convert resume', 'error');